@@ -0,0 +1,224 @@
+"""
+analytics.py — Aggregate statistics over many recorded session files.
+
+Session files (see ``recording.py``) are processed as a stream. Paths come
+lazily from a directory walk and are handed to a process pool in chunks.
+Each worker memory-maps a file, views its delta block as a NumPy structured
+array (one column per :data:`spectator.DELTA` field, no copy), and folds it
+into a fixed-size :class:`Aggregate`. Partial aggregates are merged as they
+arrive, so memory depends on the chunk size and the board size, not on the
+number of sessions.
+
+Outputs:
+
+* ``pickups_by_difficulty.csv``: power-ups spawned, taken and expired, with
+  the pickup rate.
+* ``score_by_powerup_delay.csv``: session count, mean, stddev and max score,
+  and mean ticks, for each ``powerup_delay``.
+* ``deaths_<cols>x<rows>.csv`` and ``.png``: death-position heatmaps.
+
+Run ``python analytics.py SESSIONS_DIR -o OUT_DIR``.
+"""
+
+from itertools import islice
+import argparse
+import csv
+import mmap
+import multiprocessing as mp
+import os
+
+import numpy as np
+
+from recording import SUFFIX, read_header
+from spectator import EV_DEATH, EV_POWERUP_EXPIRED, EV_POWERUP_SPAWNED, EV_POWERUP_TAKEN
+
+
+DELTA_DTYPE = np.dtype(
+    [
+        ("type", "S1"),
+        ("tick", "<u4"),
+        ("events", "u1"),
+        ("state", "u1"),
+        ("head", "<u4"),
+        ("removed", "<u2"),
+        ("food", "<u4"),
+        ("power_key", "i1"),
+        ("power_cell", "<u4"),
+        ("score", "<i4"),
+    ]
+)
+CHUNK = 256  # session files per worker task
+
+
+def iter_session_paths(root):
+    """Yield session file paths under ``root`` without listing them all up front."""
+    stack = [str(root)]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith(SUFFIX):
+                    yield entry.path
+
+
+def _chunks(iterable, size: int):
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class Aggregate:
+    """Mergeable running totals; size is independent of the session count."""
+
+    def __init__(self):
+        self.sessions = 0
+        self.skipped = 0
+        self.pickups = {}  # difficulty -> [sessions, spawned, taken, expired]
+        self.scores = {}  # powerup delay -> [sessions, sum, sum of squares, max, ticks]
+        self.deaths = {}  # (cols, rows) -> flat int64 counts per cell
+
+    def add_file(self, path):
+        try:
+            with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                meta = read_header(mm)
+                deltas = np.frombuffer(mm, DELTA_DTYPE, meta["count"], meta["deltas"])
+                self.add_session(meta, deltas)
+                del deltas
+        except (OSError, ValueError):
+            self.skipped += 1
+
+    def add_session(self, meta, deltas):
+        events = deltas["events"]
+        self.sessions += 1
+        row = self.pickups.setdefault(meta["difficulty"], [0, 0, 0, 0])
+        row[0] += 1
+        row[1] += int(np.count_nonzero(events & EV_POWERUP_SPAWNED))
+        row[2] += int(np.count_nonzero(events & EV_POWERUP_TAKEN))
+        row[3] += int(np.count_nonzero(events & EV_POWERUP_EXPIRED))
+
+        score = int(deltas["score"][-1]) if len(deltas) else 0
+        ticks = int(deltas["tick"][-1] - deltas["tick"][0] + 1) if len(deltas) else 0
+        row = self.scores.setdefault(meta["powerup_delay"], [0, 0, 0, 0, 0])
+        row[0] += 1
+        row[1] += score
+        row[2] += score * score
+        row[3] = max(row[3], score)
+        row[4] += ticks
+
+        died = deltas["head"][(events & EV_DEATH) != 0]
+        if len(died):
+            size = (meta["cols"], meta["rows"])
+            grid = self.deaths.get(size)
+            if grid is None:
+                grid = self.deaths[size] = np.zeros(size[0] * size[1], dtype=np.int64)
+            np.add.at(grid, died.astype(np.intp), 1)
+
+    def merge(self, other: "Aggregate"):
+        self.sessions += other.sessions
+        self.skipped += other.skipped
+        for key, row in other.pickups.items():
+            mine = self.pickups.setdefault(key, [0, 0, 0, 0])
+            for i, value in enumerate(row):
+                mine[i] += value
+        for key, row in other.scores.items():
+            mine = self.scores.setdefault(key, [0, 0, 0, 0, 0])
+            mine[0] += row[0]
+            mine[1] += row[1]
+            mine[2] += row[2]
+            mine[3] = max(mine[3], row[3])
+            mine[4] += row[4]
+        for size, grid in other.deaths.items():
+            if size in self.deaths:
+                self.deaths[size] += grid
+            else:
+                self.deaths[size] = grid
+        return self
+
+
+def _aggregate_chunk(paths) -> Aggregate:
+    agg = Aggregate()
+    for path in paths:
+        agg.add_file(path)
+    return agg
+
+
+def aggregate(root, workers=None, chunk: int = CHUNK) -> Aggregate:
+    """Fold every session file under ``root`` into one :class:`Aggregate`."""
+    total = Aggregate()
+    chunks = _chunks(iter_session_paths(root), chunk)
+    if workers == 0:
+        for paths in chunks:
+            total.merge(_aggregate_chunk(paths))
+        return total
+    with mp.get_context("spawn").Pool(workers) as pool:
+        # imap_unordered pulls chunks lazily, so only a few are in flight at once.
+        for part in pool.imap_unordered(_aggregate_chunk, chunks):
+            total.merge(part)
+    return total
+
+
+def _heat_color(t: float):
+    """Black -> red -> yellow -> white ramp for ``t`` in [0, 1]."""
+    return (
+        int(255 * min(1.0, t * 3)),
+        int(255 * min(1.0, max(0.0, t * 3 - 1))),
+        int(255 * max(0.0, t * 3 - 2)),
+    )
+
+
+def write_heatmap(path, grid, cols: int, rows: int, cell: int = 16):
+    import pygame
+
+    counts = grid.reshape(rows, cols)
+    peak = counts.max() or 1
+    # Log scale keeps rare death spots visible next to hot ones.
+    levels = np.log1p(counts) / np.log1p(peak)
+    ramp = np.array([_heat_color(i / 255) for i in range(256)], dtype=np.uint8)
+    pixels = ramp[(levels * 255).astype(np.uint8)]
+    pixels = pixels.repeat(cell, axis=0).repeat(cell, axis=1)
+    surface = pygame.surfarray.make_surface(pixels.transpose(1, 0, 2))
+    pygame.image.save(surface, str(path))
+
+
+def write_reports(agg: Aggregate, out_dir):
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, "pickups_by_difficulty.csv"), "w", newline="") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(["difficulty", "sessions", "spawned", "taken", "expired", "pickup_rate"])
+        for name, (sessions, spawned, taken, expired) in sorted(agg.pickups.items()):
+            rate = taken / spawned if spawned else 0.0
+            writer.writerow([name, sessions, spawned, taken, expired, f"{rate:.4f}"])
+    with open(os.path.join(out_dir, "score_by_powerup_delay.csv"), "w", newline="") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(["powerup_delay", "sessions", "mean_score", "std_score", "max_score", "mean_ticks"])
+        for delay, (n, total, squares, best, ticks) in sorted(agg.scores.items()):
+            mean = total / n
+            std = max(0.0, squares / n - mean * mean) ** 0.5
+            writer.writerow([delay, n, f"{mean:.3f}", f"{std:.3f}", best, f"{ticks / n:.1f}"])
+    for (cols, rows), grid in agg.deaths.items():
+        stem = os.path.join(out_dir, f"deaths_{cols}x{rows}")
+        np.savetxt(stem + ".csv", grid.reshape(rows, cols), fmt="%d", delimiter=",")
+        try:
+            write_heatmap(stem + ".png", grid, cols, rows)
+        except Exception:
+            pass  # pygame unavailable: the CSV still has the counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aggregate recorded Batman Snake sessions.")
+    parser.add_argument("sessions", help="directory of session files (searched recursively)")
+    parser.add_argument("-o", "--out", default="analytics_out")
+    parser.add_argument("--workers", type=int, default=None, help="0 = run in this process")
+    parser.add_argument("--chunk", type=int, default=CHUNK)
+    args = parser.parse_args(argv)
+    agg = aggregate(args.sessions, args.workers, args.chunk)
+    write_reports(agg, args.out)
+    print(f"{agg.sessions} sessions aggregated, {agg.skipped} skipped -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+audio.py — Low-latency sound effects from a pre-decoded buffer pool.
+
+Every effect is decoded into a ``pygame.mixer.Sound`` when the bank loads,
+so triggering one is a dictionary lookup plus ``Channel.play``. Effects use
+a fixed set of reserved channels (music streams separately); when all of
+them are busy the oldest voice is stolen. An effect retriggered within its
+cooldown is skipped rather than stacking voices. Without a working mixer the
+bank stays disabled and ``play`` is a no-op.
+"""
+
+from array import array
+from pathlib import Path
+import math
+import time
+
+import pygame
+
+
+# (start Hz, end Hz, seconds) used when an effect file is missing.
+FALLBACK_TONES = {
+    "eat": (660.0, 990.0, 0.07),
+    "batboost": (440.0, 1320.0, 0.25),
+    "jokertrap": (880.0, 220.0, 0.3),
+    "death": (330.0, 80.0, 0.6),
+}
+
+
+def synth_tone(start_hz: float, end_hz: float, seconds: float, volume: float = 0.35):
+    """Build a sweep as a Sound matching the mixer format, or None."""
+    init = pygame.mixer.get_init()
+    if not init:
+        return None
+    freq, size, channels = init
+    if size != -16:
+        return None
+    count = max(1, int(freq * seconds))
+    amp = 32767 * volume
+    samples = array("h")
+    phase = 0.0
+    for i in range(count):
+        t = i / count
+        hz = start_hz + (end_hz - start_hz) * t
+        phase += 2 * math.pi * hz / freq
+        envelope = min(1.0, 20 * t) * (1.0 - t)
+        value = int(amp * envelope * math.sin(phase))
+        samples.extend([value] * channels)
+    return pygame.mixer.Sound(buffer=samples.tobytes())
+
+
+class SoundBank:
+    def __init__(self, config, channels=None):
+        self.config = config
+        self.num_channels = int(channels or config.sfx_channels)
+        self.sounds: dict[str, pygame.mixer.Sound] = {}
+        self.channels: list = []
+        self._started: list[int] = []
+        self._plays = 0
+        self.cooldown = float(getattr(config, "sfx_cooldown_ms", 0)) / 1000.0
+        self._last_played: dict[str, float] = {}
+        self.enabled = False
+
+    def load(self) -> bool:
+        """Decode every effect up front; returns whether audio is available."""
+        self.enabled = False
+        try:
+            if not pygame.mixer.get_init():
+                return False
+            total = max(pygame.mixer.get_num_channels(), self.num_channels)
+            pygame.mixer.set_num_channels(total)
+            pygame.mixer.set_reserved(self.num_channels)
+            self.channels = [pygame.mixer.Channel(i) for i in range(self.num_channels)]
+        except Exception:
+            return False
+        self._started = [0] * len(self.channels)
+
+        self.sounds = {}
+        for name, filename in self.config.sfx_files.items():
+            sound = None
+            path = Path(self.config.assets_dir) / filename
+            if path.exists():
+                try:
+                    sound = pygame.mixer.Sound(str(path))
+                except Exception:
+                    sound = None
+            if sound is None and name in FALLBACK_TONES:
+                try:
+                    sound = synth_tone(*FALLBACK_TONES[name])
+                except Exception:
+                    sound = None
+            if sound is not None:
+                sound.set_volume(self.config.sfx_volume)
+                self.sounds[name] = sound
+        self.enabled = bool(self.channels and self.sounds)
+        return self.enabled
+
+    def _pick_channel(self) -> int:
+        oldest = 0
+        for i, channel in enumerate(self.channels):
+            if not channel.get_busy():
+                return i
+            if self._started[i] < self._started[oldest]:
+                oldest = i
+        return oldest
+
+    def play(self, name: str, now=None) -> bool:
+        """Start ``name`` on a voice; returns False if disabled or cooling down."""
+        if not self.enabled:
+            return False
+        sound = self.sounds.get(name)
+        if sound is None:
+            return False
+        if now is None:
+            now = time.perf_counter()
+        last = self._last_played.get(name)
+        if last is not None and now - last < self.cooldown:
+            return False
+        self._last_played[name] = now
+        idx = self._pick_channel()
+        self._plays += 1
+        self._started[idx] = self._plays
+        self.channels[idx].play(sound)
+        return True
@@ -0,0 +1,597 @@
+"""
+bench.py — Micro-benchmarks for engine hot paths.
+
+Run ``python bench.py`` for everything or ``python bench.py <name> ...`` for a
+subset. Rendering benchmarks use SDL's dummy drivers, so no window opens.
+"""
+
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+
+def _rate(fn, seconds: float = 1.0) -> float:
+    """Return calls per second of ``fn`` over roughly ``seconds``."""
+    fn()
+    calls = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < seconds:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+    return calls / elapsed
+
+
+def bench_state(length: int = 10_000):
+    import copy
+    import random
+    from array import array
+    from collections import deque
+
+    from game_state import GameState
+
+    side = 128
+    st = GameState(side, side)
+    st.body = array("I", range(length))
+    st.food = length + 1
+    _, words, st.rng_gauss = random.Random(1).getstate()
+    st.rng_words = array("I", words)
+    blob = st.to_bytes()
+
+    legacy = {
+        "body": deque((c % side, c // side) for c in range(length)),
+        "rng": random.Random(1),
+    }
+
+    print(f"state: snake length {length}, {len(blob)} bytes serialised")
+    print(f"  clone        {_rate(st.clone):>12,.0f} /s")
+    print(f"  to_bytes     {_rate(st.to_bytes):>12,.0f} /s")
+    print(f"  from_bytes   {_rate(lambda: GameState.from_bytes(blob)):>12,.0f} /s")
+    print(f"  deepcopy     {_rate(lambda: copy.deepcopy(legacy)):>12,.0f} /s (deque baseline)")
+
+
+def bench_vector_env(num_envs: int = 8, steps: int = 2000):
+    import random
+
+    from game_settings import Config
+    from snake_env import VectorEnv
+
+    for side in (24, 96):
+        cfg = Config()
+        cfg.set_grid(side, side)
+        for shared in (False, True):
+            rng = random.Random(0)
+            with VectorEnv(num_envs, shared_memory=shared, config=cfg) as env:
+                env.reset(seed=0)
+                start = time.perf_counter()
+                for _ in range(steps // num_envs):
+                    env.step([rng.randrange(4) for _ in range(num_envs)])
+                elapsed = time.perf_counter() - start
+            mode = "shared memory" if shared else "pickled"
+            rate = (steps // num_envs) * num_envs / elapsed
+            print(f"vector_env: {num_envs} envs, {side}x{side} grid, {mode:<13} {rate:>10,.0f} steps/s")
+
+
+def _long_snake_game(side: int = 96, length: int = 4000, backend: str = "surface"):
+    from collections import deque
+
+    from game import Game
+    from game_settings import Config
+
+    cfg = Config()
+    cfg.set_grid(side, side)
+    cfg.quality_adaptive = False
+    cfg.render_backend = backend
+    cfg.render_accelerated = os.environ.get("SDL_VIDEODRIVER") != "dummy"
+    game = Game(cfg)
+    game.init_pygame()
+    game.start_game()
+    game.snake.body = deque(
+        (i % side if (i // side) % 2 == 0 else side - 1 - i % side, i // side)
+        for i in range(length)
+    )
+    game._spawn_power_up()
+    return game
+
+
+def bench_quality(side: int = 96, length: int = 4000):
+    from quality import TIER_NAMES, QualityGovernor
+
+    game = _long_snake_game(side, length)
+    costs = []
+    for tier, name in enumerate(TIER_NAMES):
+        game.quality = tier
+        ms = 1000.0 / _rate(game.draw, 0.5)
+        costs.append(ms)
+        print(f"quality: {side}x{side} grid, length {length}, tier {name:<8} {ms:7.2f} ms/frame")
+
+    # Replay the measured costs against a budget that only the lower tiers meet.
+    budget = (costs[1] + costs[-1]) / 2
+    governor = QualityGovernor(budget, clock=iter(range(10**9)).__next__)
+    for _ in range(600):
+        governor.record(costs[governor.tier])
+    print(f"  governor at {budget:.2f} ms budget settles on '{governor.tier_name}' "
+          f"after {governor.changes} changes; frames per tier {governor.tier_times()}")
+
+
+def bench_audio(triggers: int = 20_000):
+    import pygame
+
+    from audio import SoundBank
+    from game_settings import Config
+
+    cfg = Config()
+    pygame.mixer.pre_init(44100, -16, 2, cfg.audio_buffer)
+    pygame.init()
+    bank = SoundBank(cfg)
+    start = time.perf_counter()
+    if not bank.load():
+        print("audio: no mixer available, sound effects disabled")
+        pygame.quit()
+        return
+    load_ms = (time.perf_counter() - start) * 1000
+    bank.cooldown = 0.0  # time every trigger, not the cooldown check
+    names = list(bank.sounds)
+    samples = []
+    for i in range(triggers):
+        t0 = time.perf_counter()
+        bank.play(names[i % len(names)])
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    freq = pygame.mixer.get_init()[0]
+    print(f"audio: {len(names)} effects decoded in {load_ms:.1f} ms, {bank.num_channels} voices")
+    print(f"  trigger p50 {samples[len(samples) // 2] * 1e6:6.1f} us   "
+          f"p99 {samples[int(len(samples) * 0.99)] * 1e6:6.1f} us")
+    print(f"  mixer buffer {cfg.audio_buffer} samples = {1000 * cfg.audio_buffer / freq:.1f} ms device latency")
+    pygame.quit()
+
+
+def bench_viewport():
+    import pygame
+
+    from game import Game
+    from game_settings import Config
+
+    for mode in ("nearest", "smooth"):
+        for scale in (1, 2, 4):
+            cfg = Config()
+            cfg.window_scale = scale
+            cfg.scale_mode = mode
+            cfg.quality_adaptive = False
+            game = Game(cfg)
+            game.init_pygame()
+            game.start_game()
+            for _ in range(40):
+                game.update()
+            draw_ms = 1000.0 / _rate(game.draw, 0.5)
+            window = pygame.display.get_surface().get_size()
+            print(f"viewport: {mode:<7} {scale}x window {window[0]}x{window[1]:<5} {draw_ms:6.2f} ms/frame")
+            pygame.quit()
+
+
+def bench_level(side: int = 4096):
+    import random
+    import tempfile
+
+    from level import FLOOR, WALL, Level, write_level
+
+    floor = bytes([FLOOR]) * side
+    pillars = bytes([FLOOR, WALL]) * (side // 2)
+    grid = (floor + pillars) * (side // 2)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "big.lvl")
+        start = time.perf_counter()
+        write_level(path, side, side, grid, portals=[((0, 0), (side - 2, side - 2))])
+        write_s = time.perf_counter() - start
+        size_mb = os.path.getsize(path) / 2**20
+
+        rng = random.Random(0)
+        loads = []
+        for _ in range(20):
+            t0 = time.perf_counter()
+            level = Level.load(path)
+            level.sample_spawn(rng, ())
+            loads.append(time.perf_counter() - t0)
+            level.close()
+        level = Level.load(path)
+        spawn_us = 1e6 / _rate(lambda: level.sample_spawn(rng, ()), 0.5)
+        level.close()
+    loads.sort()
+    print(f"level: {side}x{side}, {size_mb:.1f} MiB on disk, written in {write_s:.2f} s")
+    print(f"  load + first spawn  median {loads[len(loads) // 2] * 1e3:.3f} ms")
+    print(f"  spawn sample        {spawn_us:.2f} us")
+
+
+def bench_reach(side: int = 256, length: int = 20_000, ticks: int = 4000, every: int = 20):
+    import random
+    from collections import deque
+
+    from reachability import ReachabilityTracker
+
+    # A serpentine loop over the whole torus: the snake follows it forever
+    # without colliding, so the board keeps a large reachable region.
+    path = [
+        (x if y % 2 == 0 else side - 1 - x, y) for y in range(side) for x in range(side)
+    ]
+
+    def naive_spawn(rng, occupied, head):
+        seen = {head}
+        frontier = deque([head])
+        free = []
+        while frontier:
+            x, y = frontier.popleft()
+            for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+                n = ((x + dx) % side, (y + dy) % side)
+                if n not in seen and n not in occupied:
+                    seen.add(n)
+                    free.append(n)
+                    frontier.append(n)
+        return rng.choice(free)
+
+    for mode in ("naive BFS", "union-find"):
+        rng = random.Random(0)
+        body = deque(reversed(path[:length]))
+        occupied = set(body)
+        tracker = ReachabilityTracker(side, side)
+        tracker.rebuild(body)
+        spawn_s = 0.0
+        update_s = 0.0
+        for t in range(ticks):
+            head = path[(length + t) % len(path)]
+            t0 = time.perf_counter()
+            body.appendleft(head)
+            occupied.add(head)
+            tail = body.pop()
+            occupied.discard(tail)
+            if mode == "union-find":
+                tracker.occupy(head)
+                tracker.release(tail)
+            update_s += time.perf_counter() - t0
+            if t % every == 0:
+                t0 = time.perf_counter()
+                if mode == "naive BFS":
+                    naive_spawn(rng, occupied, head)
+                else:
+                    tracker.sample(rng, occupied)
+                spawn_s += time.perf_counter() - t0
+        spawns = ticks // every
+        extra = f", {tracker.rebuilds - 1} rebuilds" if mode == "union-find" else ""
+        print(f"reach: {side}x{side} board, length {length}, {mode:<10} "
+              f"{spawn_s / spawns * 1e3:8.3f} ms/spawn, "
+              f"{(spawn_s + update_s) / spawns * 1e3:8.3f} ms/spawn incl. tick updates{extra}")
+
+
+def bench_rebuild(sides=(1025, 4096)):
+    import tempfile
+
+    from level import FLOOR, WALL, Level, write_level
+    from reachability import ReachabilityTracker
+
+    for side in sides:
+        floor = bytes([FLOOR]) * side
+        pillars = bytes([FLOOR, WALL]) * (side // 2) + bytes([FLOOR]) * (side % 2)
+        grid = ((floor + pillars) * (side // 2) + floor * (side % 2))[: side * side]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "big.lvl")
+            write_level(path, side, side, grid)
+            level = Level.load(path)
+            tracker = ReachabilityTracker(side, side, level)
+            body = [(x, 0) for x in range(10, 0, -1)]
+            t0 = time.perf_counter()
+            tracker.rebuild(body)
+            sync_s = time.perf_counter() - t0
+
+            # Off-tick: reset() returns at once; queries keep answering while
+            # the labels are recomputed on the background thread.
+            t0 = time.perf_counter()
+            tracker.reset(body)
+            reset_s = time.perf_counter() - t0
+            worst = 0.0
+            t0 = time.perf_counter()
+            while tracker._job is not None:
+                q0 = time.perf_counter()
+                tracker.head_roots()
+                worst = max(worst, time.perf_counter() - q0)
+                time.sleep(1 / 60)
+            done_s = time.perf_counter() - t0
+            del tracker
+            level.close()
+        print(f"rebuild: {side}x{side}, blocking {sync_s * 1e3:8.1f} ms, "
+              f"reset on tick {reset_s * 1e3:6.1f} ms, background {done_s:5.2f} s, "
+              f"worst query while pending {worst * 1e3:6.2f} ms")
+
+
+def bench_backends():
+    import pygame
+
+    for side, length in ((24, 200), (96, 4000)):
+        for backend in ("surface", "texture"):
+            game = _long_snake_game(side, length, backend)
+            kind = type(game.canvas).__name__
+            ms = 1000.0 / _rate(game.draw, 0.5)
+            print(f"backends: {side}x{side} grid, length {length:>5}, {kind:<14} {ms:7.2f} ms/frame")
+            pygame.quit()
+
+
+def _spectator_viewers(port, count, seconds, result):
+    """Open ``count`` viewers (half WebSocket, every tenth never reads) and report bytes read."""
+    import asyncio
+    import base64
+
+    from spectator import TCP_HELLO
+
+    async def viewer(i, received):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        if i % 2:
+            key = base64.b64encode(os.urandom(16))
+            writer.write(b"GET / HTTP/1.1\r\nHost: localhost\r\nUpgrade: websocket\r\n"
+                         b"Connection: Upgrade\r\nSec-WebSocket-Key: " + key + b"\r\n\r\n")
+            await reader.readuntil(b"\r\n\r\n")
+        else:
+            writer.write(TCP_HELLO)
+        loop = asyncio.get_running_loop()
+        end = loop.time() + seconds
+        if i % 10 == 9:
+            writer.transport.pause_reading()  # stalled viewer: the hub must drop its frames
+            await asyncio.sleep(seconds)
+        while loop.time() < end:
+            try:
+                data = await asyncio.wait_for(reader.read(65536), end - loop.time())
+            except asyncio.TimeoutError:
+                break
+            if not data:
+                break
+            received[i] += len(data)
+        writer.close()
+
+    async def main():
+        received = [0] * count
+        await asyncio.gather(*(viewer(i, received) for i in range(count)))
+        result.put(sum(received))
+
+    asyncio.run(main())
+
+
+def bench_spectator(viewers: int = 500, rate: int = 60, seconds: float = 4.0):
+    import multiprocessing as mp
+    import statistics
+
+    from game import Game
+    from game_settings import Config
+    from snake_env import ACTIONS
+
+    for count in (0, viewers):
+        cfg = Config()
+        game = Game(cfg, headless=True)
+        game.rng.seed(7)
+        game.start_game()
+        hub = game.start_spectators(0)
+        proc = None
+        if count:
+            ctx = mp.get_context("spawn")
+            result = ctx.Queue()
+            proc = ctx.Process(target=_spectator_viewers, args=(hub.port, count, seconds + 2, result))
+            proc.start()
+            deadline = time.perf_counter() + 30
+            while len(hub.viewers) < count and time.perf_counter() < deadline:
+                time.sleep(0.05)
+        period = 1.0 / rate
+        lateness = []
+        work = []
+        ticks = 0
+        start = next_tick = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            now = time.perf_counter()
+            if now < next_tick:
+                time.sleep(next_tick - now)
+                now = time.perf_counter()
+            lateness.append((now - next_tick) * 1000.0)
+            next_tick += period
+            if game.state == "game_over":
+                game.start_game()
+            if game.rng.random() < 0.2:
+                game.snake.set_direction(game.rng.choice(ACTIONS))
+            game.update()
+            game.publisher.on_tick(game)
+            work.append((time.perf_counter() - now) * 1000.0)
+            ticks += 1
+        achieved = ticks / (time.perf_counter() - start)
+        connected = len(hub.viewers)
+        sent, dropped = hub.frames_sent, hub.frames_dropped
+        game.stop_spectators()
+        received = ""
+        if proc is not None:
+            received = f", {result.get() / 1e6:.1f} MB received"
+            proc.join()
+        late = sorted(lateness)
+        print(f"spectator: {connected:>3} viewers, target {rate} Hz, achieved {achieved:6.2f} Hz, "
+              f"tick lateness p50 {statistics.median(late):5.2f} ms p99 {late[int(len(late) * 0.99)]:5.2f} ms, "
+              f"tick work p99 {sorted(work)[int(len(work) * 0.99)]:5.3f} ms, "
+              f"{sent} frames sent, {dropped} dropped{received}")
+
+
+def bench_sessions(counts=(1000, 2000, 3000, 4000), seconds: float = 3.0):
+    import asyncio
+    import json
+    import random
+
+    from session_server import SessionHost, SessionServer
+
+    difficulties = ("Rookie", "Vigilante", "Dark Knight")
+    characters = ("Batman", "Joker")
+
+    async def drive(host, seconds):
+        # Every 100 ms: steer a tenth of the sessions and restart finished ones.
+        rng = random.Random(1)
+        end = asyncio.get_running_loop().time() + seconds
+        while asyncio.get_running_loop().time() < end:
+            for session in list(host.sessions.values()):
+                if session.game.state == "game_over":
+                    host.handle({"op": "restart", "id": session.id})
+                elif rng.random() < 0.1:
+                    session.steer(rng.randrange(4))
+            await asyncio.sleep(0.1)
+
+    async def host_only(count):
+        host = SessionHost()
+        for i in range(count):
+            host.create(difficulties[i % 3], characters[i % 2], seed=i)
+        await asyncio.sleep(0.5)
+        for session in host.sessions.values():
+            session.max_lag_ms = 0.0
+            session.ticks = session.missed = 0
+        await drive(host, seconds)
+        m = host.metrics()
+        ticks = sum(s.ticks for s in host.sessions.values())
+        for session_id in list(host.sessions):
+            host.close(session_id)
+        await asyncio.sleep(0.2)
+        print(f"sessions: {count:>5} games, groups {m['groups']}, {ticks / seconds:8.0f} ticks/s, "
+              f"load {m['load']:.2f}, lag p50 {m['lag_p50_ms']:6.2f} ms p99 {m['lag_p99_ms']:6.2f} ms, "
+              f"{m['missed_ticks']} missed ticks")
+
+    async def api(count=200, requests=5000):
+        # saturation=0 forces one worker so requests cross the shard hop as well.
+        server = await SessionServer(max_workers=1, saturation=0.0).start()
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+
+        async def call(msg):
+            writer.write(json.dumps(msg).encode() + b"\n")
+            return json.loads(await reader.readline())
+
+        ids = [(await call({"op": "create", "seed": i}))["id"] for i in range(count)]
+        start = asyncio.get_running_loop().time()
+        for i in range(requests):
+            await call({"op": "input", "id": ids[i % count], "dir": i % 4})
+        rtt = (asyncio.get_running_loop().time() - start) / requests
+        metrics = await call({"op": "metrics"})
+        placed = {s["shard"]: s["sessions"] for s in metrics["shards"]}
+        writer.close()
+        await writer.wait_closed()
+        await asyncio.sleep(0.1)
+        server.close()
+        print(f"sessions: socket API {rtt * 1e6:7.1f} us/request round trip, placement {placed}")
+
+    for count in counts:
+        asyncio.run(host_only(count))
+    asyncio.run(api())
+
+
+def _record_random_sessions(directory, count: int, seed: int = 0):
+    import random
+
+    from game import Game
+    from game_settings import Config
+    from recording import SessionRecorder
+    from snake_env import ACTIONS
+
+    rng = random.Random(seed)
+    recorder = SessionRecorder(directory)
+    cfg = Config()
+    game = Game(cfg, headless=True)
+    game.rng.seed(seed)
+    for i in range(count):
+        game.selected_difficulty = i % len(game.difficulty_names)
+        game.selected_character = i % len(game.character_names)
+        game.start_game()
+        while game.state == "playing":
+            # Chase the food with some random turns so runs grow and end.
+            (hx, hy), (fx, fy) = game.snake.head(), game.food.pos or game.snake.head()
+            if rng.random() < 0.2:
+                game.snake.set_direction(rng.choice(ACTIONS))
+            elif hx != fx:
+                game.snake.set_direction((1, 0) if (fx - hx) % cfg.cols < cfg.cols // 2 else (-1, 0))
+            else:
+                game.snake.set_direction((0, 1) if (fy - hy) % cfg.rows < cfg.rows // 2 else (0, -1))
+            game.update()
+            recorder.on_tick(game)
+    recorder.finish()
+
+
+def bench_analytics(sessions: int = 100_000, unique: int = 1000):
+    import resource
+    import shutil
+    import tempfile
+
+    from analytics import aggregate, write_reports
+
+    root = tempfile.mkdtemp(prefix="bsr-")
+    try:
+        start = time.perf_counter()
+        _record_random_sessions(os.path.join(root, "base"), unique)
+        recorded = time.perf_counter() - start
+        base = sorted(os.scandir(os.path.join(root, "base")), key=lambda e: e.name)
+        size = sum(e.stat().st_size for e in base)
+        # Hard links stand in for a large collection without recording it all.
+        for shard in range(sessions // unique - 1):
+            directory = os.path.join(root, f"copy{shard}")
+            os.mkdir(directory)
+            for entry in base:
+                os.link(entry.path, os.path.join(directory, entry.name))
+        total = len(base) * (sessions // unique)
+        for workers in (0, None):
+            start = time.perf_counter()
+            agg = aggregate(root, workers)
+            elapsed = time.perf_counter() - start
+            label = "in-process" if workers == 0 else f"pool x{os.cpu_count()}"
+            print(f"analytics: {agg.sessions} sessions ({size * total / len(base) / 1e6:.0f} MB) "
+                  f"{label:<10} {elapsed:6.2f} s, {agg.sessions / elapsed:8.0f} sessions/s")
+        write_reports(agg, os.path.join(root, "out"))
+        with open(os.path.join(root, "out", "pickups_by_difficulty.csv")) as fh:
+            print("analytics: " + fh.read().strip().replace("\n", "\nanalytics: "))
+        own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        kids = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+        print(f"analytics: recorded {len(base)} real sessions in {recorded:.1f} s; "
+              f"peak RSS {own:.0f} MB parent, {kids:.0f} MB largest worker; "
+              f"reports: {sorted(os.listdir(os.path.join(root, 'out')))}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def bench_pixels(steps: int = 3000):
+    import numpy as np
+
+    from snake_env import PixelSnakeEnv
+
+    for stack, downsample in ((1, 1), (1, 2), (4, 1), (4, 4)):
+        env = PixelSnakeEnv(stack=stack, downsample=downsample, copy_obs=False)
+        obs, _ = env.reset(seed=0)
+        shared = np.shares_memory(obs, env.game.canvas.buffer)
+        fps = _rate(env.game.draw, 1.0)
+        rng = np.random.default_rng(0)
+
+        def step():
+            _, _, terminated, truncated, _ = env.step(int(rng.integers(4)))
+            if terminated or truncated:
+                env.reset()
+
+        sps = _rate(step, 1.0)
+        print(f"pixels: {env.cfg.width}x{env.cfg.height} stack {stack} downsample {downsample}: "
+              f"obs {obs.shape} view={shared}, {fps:7.0f} frames/s draw, {sps:7.0f} steps/s env")
+
+
+BENCHMARKS = {
+    "state": bench_state,
+    "vector_env": bench_vector_env,
+    "quality": bench_quality,
+    "audio": bench_audio,
+    "viewport": bench_viewport,
+    "level": bench_level,
+    "reach": bench_reach,
+    "rebuild": bench_rebuild,
+    "backends": bench_backends,
+    "spectator": bench_spectator,
+    "sessions": bench_sessions,
+    "analytics": bench_analytics,
+    "pixels": bench_pixels,
+}
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        BENCHMARKS[name]()
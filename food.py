@@ -4,21 +4,26 @@ from typing import Tuple, Optional
 
 import pygame
 
+from quality import QUALITY_MINIMAL, QUALITY_REDUCED
+from render import load_image
+
 
 Vec2 = Tuple[int, int]
 
 
 class Food:
-    def __init__(self, config):
+    def __init__(self, config, rng=None, level=None):
         self.config = config
-        self.pos: Vec2 = (0, 0)
+        self.rng = rng or random
+        self.level = level
+        self.pos: Optional[Vec2] = (0, 0)  # None = off the board until a cell frees up
         self.img = None
         self.glow = None
 
     def load_assets(self):
         try:
             path = f"{self.config.assets_dir}/{self.config.img_food}"
-            img = pygame.image.load(path).convert_alpha()
+            img = load_image(path)
             self.img = pygame.transform.smoothscale(
                 img, (self.config.cell_size, self.config.cell_size)
             )
@@ -33,8 +38,22 @@ class Food:
             size // 2,
         )
 
-    def respawn(self, forbidden):
+    def respawn(self, forbidden, reach=None):
         # forbidden: iterable of grid positions to avoid (e.g., snake body)
+        # reach: optional ReachabilityTracker limiting spawns to the head's region
+        if reach is not None:
+            pos = reach.sample(self.rng, forbidden)
+            if pos is not None:
+                self.pos = pos
+                return
+            if reach.head_roots():
+                # The head's region has no spawnable cell left; never fall
+                # back into a sealed pocket, keep the food off the board.
+                self.pos = None
+                return
+        if self.level is not None:
+            self.pos = self.level.sample_spawn(self.rng, forbidden)
+            return
         free = [
             (x, y)
             for x in range(self.config.cols)
@@ -42,25 +61,29 @@ class Food:
             if (x, y) not in forbidden
         ]
         if not free:
-            self.pos = (0, 0)
+            self.pos = None
         else:
-            self.pos = random.choice(free)
+            self.pos = self.rng.choice(free)
 
-    def draw(self, surf: pygame.Surface, tick_ms: Optional[int] = None):
+    def draw(self, canvas, tick_ms: Optional[int] = None, quality: int = 0, camera=(0, 0)):
         if tick_ms is None:
             tick_ms = pygame.time.get_ticks()
+        if self.pos is None or not self.config.in_view(self.pos, camera):
+            return
         cs = self.config.cell_size
-        px, py = self.config.grid_to_px(self.pos)
+        px, py = self.config.grid_to_px(self.pos, camera)
         wobble = math.sin((tick_ms / 220.0) + self.pos[0] * 0.6)
         offset = int(wobble * 4)
-        if self.glow is not None:
-            scale = 1.0 + 0.2 * math.sin((tick_ms / 310.0) + self.pos[1] * 0.4)
-            size = int(self.glow.get_width() * scale)
-            glow = pygame.transform.smoothscale(self.glow, (size, size))
-            rect = glow.get_rect(center=(px + cs // 2, py + cs // 2 + offset))
-            surf.blit(glow, rect)
+        if self.glow is not None and quality < QUALITY_MINIMAL:
+            size = self.glow.get_width()
+            if quality < QUALITY_REDUCED:
+                scale = 1.0 + 0.2 * math.sin((tick_ms / 310.0) + self.pos[1] * 0.4)
+                size = int(size * scale)
+            rect = pygame.Rect(0, 0, size, size)
+            rect.center = (px + cs // 2, py + cs // 2 + offset)
+            canvas.blit(self.glow, rect, size=rect.size)
         rect = pygame.Rect(px, py + offset, cs, cs)
         if self.img is not None:
-            surf.blit(self.img, rect)
+            canvas.blit(self.img, rect)
         else:
-            pygame.draw.rect(surf, (200, 40, 40), rect, border_radius=5)
+            canvas.rect((200, 40, 40), rect, radius=5)
@@ -1,18 +1,51 @@
+from collections import OrderedDict
 from pathlib import Path
 import math
+import os
+import random
+import time
 
 import pygame
 
+from audio import SoundBank
 from snake import Snake
 from food import Food
+from level import FLOOR, PORTAL, WALL, Level
 from power_up import PowerUp
+from reachability import ReachabilityTracker
+from render import OffscreenCanvas, SurfaceCanvas, TextureCanvas, load_image
+from viewport import Viewport
+from recording import SessionRecorder
+from spectator import BroadcastHub, TickPublisher
 from score_io import read_high_score, write_high_score
+from game_state import GameState
+from quality import QUALITY_MINIMAL, QUALITY_REDUCED, TIER_NAMES, QualityGovernor
+
+
+GRID_CACHE_BYTES = 32 * 1024 * 1024  # pre-drawn grid boards kept per pulse colour
+LEVEL_TILE_CELLS = 16  # level cells are pre-drawn in square tiles this many cells wide
+LEVEL_TILE_CACHE = 64  # tiles kept; the least recently drawn is evicted first
 
 
 class Game:
-    def __init__(self, config):
+    def __init__(self, config, headless: bool = False):
         self.cfg = config
+        self.headless = headless
+        self.rng = random.Random()
         self.screen = None
+        self.canvas = None
+        self.viewport = None
+        self.spotlight = None
+        self.game_over_overlay = None
+        self.grid_rects = []
+        self.grid_boards = {}
+        self.level = None
+        self.level_tiles = OrderedDict()  # (tile x, tile y) -> Surface
+        self.camera = (0, 0)  # top-left board cell of the view (see Config.VIEW_CELLS)
+        self.reach = None
+        if self.cfg.level_file:
+            self.level = Level.load(self.cfg.level_file)
+            self.cfg.set_grid(self.level.cols, self.level.rows)
         self.clock = None
         self.font = None
         self.small_font = None
@@ -31,6 +64,12 @@ class Game:
         self.speed_effect_delta = 0
         self.speed_effect_timer = 0
         self.frames_since_powerup = 0
+        self.quality = self.cfg.quality_start_tier
+        self.governor = None
+        self.sounds = SoundBank(self.cfg)
+        self.hub = None
+        self.publisher = None
+        self.recorder = None
 
         self.difficulty_names = list(self.cfg.difficulties.keys())
         if not self.difficulty_names:
@@ -66,14 +105,42 @@ class Game:
         base.update(self.cfg.difficulties.get(name, {}))
         return base
 
+    @property
+    def renders(self) -> bool:
+        """True when there is a canvas to draw on, so sprites must be loaded."""
+        return self.canvas is not None
+
     def init_pygame(self):
-        pygame.init()
-        try:
-            pygame.mixer.init()
-        except Exception:
-            pass
-        self.screen = pygame.display.set_mode((self.cfg.width, self.cfg.height))
-        pygame.display.set_caption(self.cfg.title)
+        if self.cfg.render_backend == "offscreen":
+            os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        if self.headless:
+            # Headless rendering only needs surfaces and fonts, not audio.
+            pygame.display.init()
+            pygame.font.init()
+        else:
+            pygame.mixer.pre_init(44100, -16, 2, self.cfg.audio_buffer)
+            pygame.init()
+            try:
+                pygame.mixer.init()
+            except Exception:
+                pass
+        self.canvas = None
+        if self.cfg.render_backend == "offscreen":
+            self.canvas = OffscreenCanvas(
+                (self.cfg.width, self.cfg.height), self.cfg.pixel_stack, self.cfg.pixel_downsample
+            )
+        elif self.cfg.render_backend == "texture":
+            try:
+                self.canvas = TextureCanvas.open(self.cfg)
+            except Exception:
+                # No usable SDL renderer: fall back to software blitting.
+                self.canvas = None
+        if self.canvas is None:
+            self.viewport = Viewport(
+                (self.cfg.width, self.cfg.height), self.cfg.window_scale, self.cfg.scale_mode
+            )
+            self.screen = self.viewport.open(self.cfg.title)
+            self.canvas = SurfaceCanvas(self.screen, self.viewport)
         self.clock = pygame.time.Clock()
         self.font = pygame.font.SysFont("consolas", 20)
         self.small_font = pygame.font.SysFont("consolas", 16)
@@ -90,7 +157,53 @@ class Game:
             self.game_over_img = None
 
         self._load_character_previews()
-        self._load_music()
+        self.level_tiles.clear()
+        self._build_overlays()
+        if not self.headless:
+            self._load_music()
+            self.sounds.load()
+        if self.cfg.quality_adaptive:
+            self.governor = QualityGovernor(
+                self._frame_budget_ms(), start_tier=self.cfg.quality_start_tier
+            )
+
+    def _level_tile(self, tx: int, ty: int) -> pygame.Surface:
+        tile = self.level_tiles.get((tx, ty))
+        if tile is not None:
+            self.level_tiles.move_to_end((tx, ty))
+            return tile
+        n = LEVEL_TILE_CELLS
+        cs = self.cfg.cell_size
+        cols = self.cfg.cols
+        x0, y0 = tx * n, ty * n
+        w = min(n, cols - x0)
+        h = min(n, self.cfg.rows - y0)
+        tile = pygame.Surface((w * cs, h * cs), pygame.SRCALPHA)
+        cells = self.level.cells
+        for y in range(h):
+            start = (y0 + y) * cols + x0
+            for x, kind in enumerate(cells[start : start + w]):
+                rect = pygame.Rect(x * cs, y * cs, cs, cs)
+                if kind == WALL:
+                    pygame.draw.rect(tile, (60, 64, 80), rect)
+                    pygame.draw.rect(tile, (90, 96, 120), rect, width=1)
+                elif kind == PORTAL:
+                    pygame.draw.circle(tile, (120, 210, 90), rect.center, cs // 2 - 2, width=3)
+        self.level_tiles[(tx, ty)] = tile
+        if len(self.level_tiles) > LEVEL_TILE_CACHE:
+            self.level_tiles.popitem(last=False)
+        return tile
+
+    def draw_level(self):
+        # Tiles are drawn once and blitted at the camera offset, so scrolling
+        # only pays for the tiles entering the view.
+        n = LEVEL_TILE_CELLS
+        cs = self.cfg.cell_size
+        ox, oy = self.camera
+        for ty in range(oy // n, (oy + self.cfg.view_rows - 1) // n + 1):
+            for tx in range(ox // n, (ox + self.cfg.view_cols - 1) // n + 1):
+                tile = self._level_tile(tx, ty)
+                self.canvas.blit(tile, ((tx * n - ox) * cs, (ty * n - oy) * cs + 48))
 
     def _load_music(self):
         music_name = getattr(self.cfg, "music_file", "")
@@ -114,7 +227,7 @@ class Game:
             asset = data.get("head") or self.cfg.img_snake_head
             path = Path(self.cfg.assets_dir) / asset
             try:
-                img = pygame.image.load(path).convert_alpha()
+                img = load_image(path)
                 scaled = pygame.transform.smoothscale(img, (preview_size, preview_size))
                 self.character_previews[name] = scaled
             except Exception:
@@ -138,12 +251,18 @@ class Game:
         self.state = "playing"
 
     def reset(self):
-        mid = (self.cfg.cols // 2, self.cfg.rows // 2)
-        self.snake = Snake(self.cfg, start=mid, character=self.current_character_data)
-        self.snake.load_assets()
-        self.food = Food(self.cfg)
-        self.food.load_assets()
-        self.food.respawn(forbidden=self.snake.body)
+        start = (self.cfg.cols // 2, self.cfg.rows // 2)
+        if self.level is not None:
+            start = self.level.start or self._level_start(start)
+        self.snake = Snake(
+            self.cfg, start=start, character=self.current_character_data, level=self.level
+        )
+        self.food = Food(self.cfg, rng=self.rng, level=self.level)
+        if self.renders:
+            self.snake.load_assets()
+            self.food.load_assets()
+        self._reset_reach()
+        self.food.respawn(forbidden=self.snake.body, reach=self.reach)
         self.power_up = None
         self.frames_since_powerup = 0
         self.speed_effect_delta = 0
@@ -154,12 +273,21 @@ class Game:
         self.game_over = False
 
         # Ensure score file exists/readable
-        self.high_score = read_high_score(self.cfg.score_file)
+        if not self.headless:
+            self.high_score = read_high_score(self.cfg.score_file)
+
+    def snapshot(self) -> GameState:
+        return GameState.capture(self)
+
+    def restore(self, state: GameState):
+        state.apply(self)
 
     def handle_events(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 self.running = False
+            elif event.type == pygame.VIDEORESIZE:
+                self.canvas.resize(event.size)
             elif event.type == pygame.KEYDOWN:
                 if event.key in (pygame.K_ESCAPE, pygame.K_q):
                     self.running = False
@@ -200,17 +328,28 @@ class Game:
     def update(self):
         if self.state != "playing":
             return
-        self.snake.move()
+        vacated = self.snake.move()
+        if self.reach is not None and not self.snake.crashed:
+            self.reach.occupy(self.snake.head())
+            if vacated is not None:
+                self.reach.release(vacated)
 
         # Eat food
         if self.snake.head() == self.food.pos:
             self.snake.grow(1)
             self.score += 1
+            self.sounds.play("eat")
             self._update_high_score()
             forbidden = set(self.snake.body)
             if self.power_up:
                 forbidden.add(self.power_up.pos)
-            self.food.respawn(forbidden=forbidden)
+            self.food.respawn(forbidden=forbidden, reach=self.reach)
+        elif self.food.pos is None:
+            # No free cell last time; retry as the snake moves.
+            forbidden = set(self.snake.body)
+            if self.power_up:
+                forbidden.add(self.power_up.pos)
+            self.food.respawn(forbidden=forbidden, reach=self.reach)
 
         # Handle power-up lifecycle
         if self.power_up:
@@ -224,10 +363,11 @@ class Game:
         if self.power_up is None and self.frames_since_powerup >= spawn_threshold:
             self._spawn_power_up()
 
-        # Self collision
-        if self.snake.collides_self():
+        # Self and wall collision
+        if self.snake.collides():
             self.game_over = True
             self.state = "game_over"
+            self.sounds.play("death")
 
         # Timers for effects/messages
         if self.speed_effect_timer > 0:
@@ -240,17 +380,39 @@ class Game:
                 self.effect_message = ""
 
     def _spawn_power_up(self):
-        self.power_up = PowerUp(self.cfg)
+        self.power_up = self._new_power_up()
         forbidden = set(self.snake.body)
-        forbidden.add(self.food.pos)
+        if self.food.pos is not None:
+            forbidden.add(self.food.pos)
         lifetime_frames = self.cfg.powerup_lifetime * self.base_fps
-        if not self.power_up.spawn(forbidden, lifetime_frames):
+        if not self.power_up.spawn(forbidden, lifetime_frames, reach=self.reach):
             self.power_up = None
         else:
             self.frames_since_powerup = 0
 
+    def _level_start(self, centre):
+        """Start on the board centre unless it is a wall or portal, else a random floor cell."""
+        if self.level.cells[centre[1] * self.cfg.cols + centre[0]] == FLOOR:
+            return centre
+        start = self.level.sample_spawn(self.rng, ())
+        if start is None:
+            raise ValueError("level has no floor cell to start on")
+        return start
+
+    def _reset_reach(self):
+        if not self.cfg.reachable_spawns:
+            self.reach = None
+            return
+        if self.reach is None or self.reach.size != self.cfg.cols * self.cfg.rows:
+            self.reach = ReachabilityTracker(self.cfg.cols, self.cfg.rows, self.level)
+        self.reach.reset(self.snake.body)
+
+    def _new_power_up(self) -> PowerUp:
+        return PowerUp(self.cfg, rng=self.rng, load_art=self.renders, level=self.level)
+
     def _consume_power_up(self):
         data = self.power_up.data
+        self.sounds.play(data["key"])
         score_delta = data.get("score", 0)
         if score_delta:
             self.score = max(0, self.score + score_delta)
@@ -261,7 +423,9 @@ class Game:
             shrink = min(len(self.snake.body) - 2, abs(grow))
             for _ in range(max(0, shrink)):
                 if len(self.snake.body) > 2:
-                    self.snake.body.pop()
+                    tail = self.snake.body.pop()
+                    if self.reach is not None:
+                        self.reach.release(tail)
         speed_delta = data.get("speed_delta", 0)
         if speed_delta:
             self.speed_effect_delta = speed_delta
@@ -277,125 +441,193 @@ class Game:
     def _update_high_score(self):
         if self.score > self.high_score:
             self.high_score = self.score
-            write_high_score(self.cfg.score_file, self.high_score)
+            if not self.headless:
+                write_high_score(self.cfg.score_file, self.high_score)
 
-    def draw_grid(self, tick_ms: int):
+    def draw_grid(self, tick_ms: int, quality: int = 0):
+        """Clear the board and draw its grid from a cached, pre-drawn board."""
+        if quality >= QUALITY_MINIMAL:
+            self.canvas.fill(self.cfg.bg_color)
+            return
         base_color = self.cfg.grid_color
-        pulse = max(0, int(18 * math.sin(tick_ms / 280.0)))
-        grid_color = tuple(min(255, c + pulse) for c in base_color)
-        cs = self.cfg.cell_size
-        for x in range(self.cfg.cols):
-            px, _ = self.cfg.grid_to_px((x, 0))
-            pygame.draw.line(self.screen, grid_color, (px, 48), (px, self.cfg.height))
-        for y in range(self.cfg.rows):
-            _, py = self.cfg.grid_to_px((0, y))
-            pygame.draw.line(self.screen, grid_color, (0, py), (self.cfg.width, py))
+        if quality >= QUALITY_REDUCED:
+            grid_color = base_color
+        else:
+            pulse = max(0, int(18 * math.sin(tick_ms / 280.0)))
+            grid_color = tuple(min(255, c + pulse) for c in base_color)
+        # One opaque copy replaces a full clear plus dozens of strided line
+        # draws; the pulse only has a handful of distinct colours.
+        board = self.grid_boards.get(grid_color)
+        size = (self.cfg.width, self.cfg.height - 48)
+        if board is None and (len(self.grid_boards) + 1) * size[0] * size[1] * 4 <= GRID_CACHE_BYTES:
+            board = self.canvas.new_surface(size)
+            board.fill(self.cfg.bg_color)
+            for rect in self.grid_rects:
+                board.fill(grid_color, rect.move(0, -48))
+            self.grid_boards[grid_color] = board
+        if board is not None:
+            self.canvas.blit(board, (0, 48))
+            return
+        self.canvas.fill(self.cfg.bg_color)
+        for rect in self.grid_rects:
+            self.canvas.rect(grid_color, rect)
+
+    def _blit_text(self, font, text, color, **anchor):
+        surf = self.canvas.text(font, text, color)
+        self.canvas.blit(surf, surf.get_rect(**anchor))
 
     def draw_hud(self):
         hud_rect = pygame.Rect(0, 0, self.cfg.width, 48)
-        pygame.draw.rect(self.screen, self.cfg.hud_bg, hud_rect)
+        self.canvas.rect(self.cfg.hud_bg, hud_rect)
         text = (
             f"Score: {self.score}    High: {self.high_score}    "
             f"Mode: {self.current_difficulty}    Hero: {self.current_character_name}"
         )
-        surf = self.font.render(text, True, self.cfg.text_color)
-        self.screen.blit(surf, (12, 6))
+        self._blit_text(self.font, text, self.cfg.text_color, topleft=(12, 6))
         if self.effect_message and self.effect_msg_timer > 0:
-            msg_surf = self.small_font.render(self.effect_message, True, (220, 200, 90))
-            self.screen.blit(msg_surf, (12, 26))
+            self._blit_text(self.small_font, self.effect_message, (220, 200, 90), topleft=(12, 26))
         else:
-            info = self.small_font.render("Esc: Quit", True, self.cfg.text_color)
-            self.screen.blit(info, (12, 26))
+            info = f"Esc: Quit    FX: {TIER_NAMES[self.quality]}"
+            self._blit_text(self.small_font, info, self.cfg.text_color, topleft=(12, 26))
 
-    def draw_menu_background(self, tick_ms: int):
-        self.screen.fill(self.cfg.bg_color)
+    def _build_overlays(self):
+        self.grid_boards = {}
+        cs = self.cfg.cell_size
+        self.grid_rects = []
+        for x in range(self.cfg.view_cols):
+            self.grid_rects.append(pygame.Rect(x * cs, 48, 1, self.cfg.height - 48))
+        for y in range(self.cfg.view_rows):
+            self.grid_rects.append(pygame.Rect(0, y * cs + 48, self.cfg.width, 1))
         radius = int(min(self.cfg.width, self.cfg.height) * 0.35)
+        self.spotlight = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+        pygame.draw.circle(self.spotlight, (240, 220, 120, 255), (radius, radius), radius)
+        self.game_over_overlay = pygame.Surface((self.cfg.width, self.cfg.height), pygame.SRCALPHA)
+        self.game_over_overlay.fill((0, 0, 0, 140))
+
+    def draw_menu_background(self, tick_ms: int):
+        self.canvas.fill(self.cfg.bg_color)
         pulse = 0.5 + 0.5 * math.sin(tick_ms / 600.0)
-        spotlight = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
-        pygame.draw.circle(
-            spotlight,
-            (240, 220, 120, int(90 + pulse * 70)),
-            (radius, radius),
-            radius,
+        spotlight_rect = self.spotlight.get_rect(
+            center=(self.cfg.width // 2, self.cfg.height // 2 + 40)
         )
-        spotlight_rect = spotlight.get_rect(center=(self.cfg.width // 2, self.cfg.height // 2 + 40))
-        self.screen.blit(spotlight, spotlight_rect)
+        self.canvas.blit(self.spotlight, spotlight_rect, alpha=int(90 + pulse * 70))
 
     def draw_menu(self, tick_ms: int):
         self.draw_menu_background(tick_ms)
-        title = self.big_font.render("Batman Snake", True, self.cfg.text_color)
-        self.screen.blit(title, title.get_rect(center=(self.cfg.width // 2, 110)))
-
-        prompt = self.small_font.render(
-            "Select difficulty (Up/Down) and hero (Left/Right)", True, self.cfg.text_color
+        cx = self.cfg.width // 2
+        self._blit_text(self.big_font, "Batman Snake", self.cfg.text_color, center=(cx, 110))
+        self._blit_text(
+            self.small_font,
+            "Select difficulty (Up/Down) and hero (Left/Right)",
+            self.cfg.text_color,
+            center=(cx, 154),
         )
-        self.screen.blit(prompt, prompt.get_rect(center=(self.cfg.width // 2, 154)))
 
         current_hero = self.character_names[self.selected_character]
         preview = self.character_previews.get(current_hero)
         if preview is not None:
             wobble = 4 * math.sin(tick_ms / 450.0)
-            rect = preview.get_rect(center=(self.cfg.width // 2, 238 + wobble))
-            self.screen.blit(preview, rect)
-        hero_label = self.font.render(f"Current hero: {current_hero}", True, (240, 200, 80))
-        self.screen.blit(hero_label, hero_label.get_rect(center=(self.cfg.width // 2, 320)))
+            rect = preview.get_rect(center=(cx, 238 + wobble))
+            self.canvas.blit(preview, rect)
+        self._blit_text(self.font, f"Current hero: {current_hero}", (240, 200, 80), center=(cx, 320))
 
         for idx, name in enumerate(self.difficulty_names):
             desc = self.cfg.difficulties.get(name, {}).get("description", "")
             label = f"{name} - {desc}" if desc else name
             is_selected = idx == self.selected_difficulty
             color = (240, 200, 80) if is_selected else self.cfg.text_color
-            surf = self.font.render(label, True, color)
             y = 360 + idx * 32
-            self.screen.blit(surf, surf.get_rect(center=(self.cfg.width // 2, y)))
+            self._blit_text(self.font, label, color, center=(cx, y))
 
-        hint = self.small_font.render("Press Enter to patrol Gotham", True, self.cfg.text_color)
-        self.screen.blit(hint, hint.get_rect(center=(self.cfg.width // 2, self.cfg.height - 60)))
+        self._blit_text(
+            self.small_font,
+            "Press Enter to patrol Gotham",
+            self.cfg.text_color,
+            center=(cx, self.cfg.height - 60),
+        )
 
     def draw_game_over(self):
-        overlay = pygame.Surface((self.cfg.width, self.cfg.height), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 140))
-        self.screen.blit(overlay, (0, 0))
-        msg1 = self.big_font.render("Game Over", True, (240, 80, 80))
-        msg2 = self.font.render("Press Enter to restart", True, self.cfg.text_color)
-        msg3 = self.small_font.render("Press M for menu", True, self.cfg.text_color)
-        self.screen.blit(msg1, msg1.get_rect(center=(self.cfg.width // 2, 90)))
-        self.screen.blit(msg2, msg2.get_rect(center=(self.cfg.width // 2, 130)))
-        self.screen.blit(msg3, msg3.get_rect(center=(self.cfg.width // 2, 158)))
+        self.canvas.blit(self.game_over_overlay, (0, 0))
+        cx = self.cfg.width // 2
+        self._blit_text(self.big_font, "Game Over", (240, 80, 80), center=(cx, 90))
+        self._blit_text(self.font, "Press Enter to restart", self.cfg.text_color, center=(cx, 130))
+        self._blit_text(self.small_font, "Press M for menu", self.cfg.text_color, center=(cx, 158))
         if self.game_over_img is not None:
-            rect = self.game_over_img.get_rect(center=(self.cfg.width // 2, (self.cfg.height + 48) // 2))
-            self.screen.blit(self.game_over_img, rect)
+            rect = self.game_over_img.get_rect(center=(cx, (self.cfg.height + 48) // 2))
+            self.canvas.blit(self.game_over_img, rect)
 
     def draw(self):
         tick_ms = pygame.time.get_ticks()
         if self.state == "menu":
             self.draw_menu(tick_ms)
         else:
-            self.screen.fill(self.cfg.bg_color)
+            self.camera = self.cfg.camera_for(self.snake.head())
+            camera = self.camera
+            self.draw_grid(tick_ms, self.quality)
+            if self.level is not None:
+                # Under the HUD, which covers tiles straddling the top edge.
+                self.draw_level()
             self.draw_hud()
-            self.draw_grid(tick_ms)
-            self.food.draw(self.screen, tick_ms)
+            self.food.draw(self.canvas, tick_ms, self.quality, camera)
             if self.power_up:
-                self.power_up.draw(self.screen, tick_ms)
-            self.snake.draw(self.screen, tick_ms)
+                self.power_up.draw(self.canvas, tick_ms, self.quality, camera)
+            self.snake.draw(self.canvas, tick_ms, self.quality, camera)
             if self.state == "game_over":
                 self.draw_game_over()
-        pygame.display.flip()
+        self.canvas.present()
 
     def get_tick_rate(self):
         if self.speed_effect_timer > 0:
             return max(4, self.base_fps + self.speed_effect_delta)
         return self.base_fps
 
+    def _frame_budget_ms(self) -> float:
+        if self.cfg.quality_budget_ms:
+            return float(self.cfg.quality_budget_ms)
+        return 1000.0 / max(1, self.get_tick_rate())
+
+    def start_spectators(self, port=None):
+        """Serve this game's ticks to spectators on ``port`` (0 = any free port)."""
+        if port is None:
+            port = self.cfg.spectator_port
+        self.hub = BroadcastHub(self.cfg.spectator_host, port).start()
+        self.publisher = TickPublisher(self.hub.publish, self.cfg.spectator_keyframe_ticks)
+        return self.hub
+
+    def stop_spectators(self):
+        if self.hub is not None:
+            self.hub.stop()
+        self.hub = None
+        self.publisher = None
+
     def run(self):
         try:
             self.init_pygame()
+            if self.cfg.spectator_port is not None:
+                try:
+                    self.start_spectators()
+                except OSError:
+                    # Port in use or not bindable: play on without spectators.
+                    self.stop_spectators()
+            if self.cfg.record_dir:
+                self.recorder = SessionRecorder(self.cfg.record_dir)
             while self.running:
+                frame_start = time.perf_counter()
                 self.handle_events()
                 self.update()
+                if self.publisher is not None:
+                    self.publisher.on_tick(self)
+                if self.recorder is not None:
+                    self.recorder.on_tick(self)
                 self.draw()
+                if self.governor is not None:
+                    work_ms = (time.perf_counter() - frame_start) * 1000.0
+                    self.quality = self.governor.record(work_ms, self._frame_budget_ms())
                 self.clock.tick(self.get_tick_rate())
         finally:
+            if self.recorder is not None:
+                self.recorder.finish()
+            self.stop_spectators()
             pygame.quit()
 
 
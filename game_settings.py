@@ -1,3 +1,6 @@
+from quality import QUALITY_FULL, QUALITY_MINIMAL
+
+
 class Config:
     """Central configuration for the Batman Snake game."""
 
@@ -5,6 +8,10 @@ class Config:
     CELL_SIZE = 24
     GRID_COLS = 24
     GRID_ROWS = 24
+    # Boards wider or taller than this many cells (large maze levels) are
+    # shown through a camera that follows the snake's head; the window, the
+    # grid cache and the level surface are sized to the view, not the board.
+    VIEW_CELLS = 48
 
     # Window settings
     TITLE = "Batman Snake"
@@ -12,11 +19,30 @@ class Config:
     GRID_COLOR = (35, 35, 35)
     TEXT_COLOR = (240, 240, 240)
     HUD_BG = (20, 20, 20)
+    WINDOW_SCALE = 1  # initial window size as a multiple of the logical size
+    SCALE_MODE = "nearest"  # "nearest" (integer, crisp) or "smooth"
+    RENDER_BACKEND = "surface"  # "surface", "texture" (SDL renderer) or "offscreen" (no window)
+    RENDER_ACCELERATED = True  # False forces SDL's software renderer for "texture"
+    PIXEL_STACK = 1  # "offscreen": frames per observation
+    PIXEL_DOWNSAMPLE = 1  # "offscreen": keep every Nth pixel in each axis
 
     # Gameplay
+    LEVEL_FILE = None  # optional maze level (see level.py); overrides the grid size
     START_LENGTH = 3
+    REACHABLE_SPAWNS = True  # only spawn items the snake can still reach
     FPS = 12
 
+    # Adaptive quality: drop cosmetic effects when frames run over budget.
+    QUALITY_ADAPTIVE = True
+    QUALITY_BUDGET_MS = None  # None = one tick at the current tick rate
+    QUALITY_START_TIER = 0
+
+    # Spectator broadcast (see spectator.py); None disables the server.
+    SPECTATOR_PORT = None
+    SPECTATOR_HOST = "127.0.0.1"
+    SPECTATOR_KEYFRAME_TICKS = 60  # full state resync interval for viewers
+    RECORD_DIR = None  # write one session file per run here (see recording.py)
+
     # File and assets
     SCORE_FILE = "highscore.txt"
     ASSETS_DIR = "assets"
@@ -25,6 +51,18 @@ class Config:
     IMG_GAME_OVER = "batman_joker_death.jpeg"
     MUSIC_FILE = "gotham_theme.ogg"
 
+    # Sound effects are decoded at load; missing files fall back to synth tones.
+    SFX_FILES = {
+        "eat": "sfx_eat.ogg",
+        "batboost": "sfx_batboost.ogg",
+        "jokertrap": "sfx_jokertrap.ogg",
+        "death": "sfx_death.ogg",
+    }
+    SFX_CHANNELS = 8
+    SFX_VOLUME = 0.7
+    SFX_COOLDOWN_MS = 40  # an effect is not retriggered sooner than this
+    AUDIO_BUFFER = 512  # mixer buffer in samples; smaller = lower latency
+
     POWERUP_ASSETS = {
         "batboost": "bat_signal.png",
         "jokertrap": "joker_card.png",
@@ -66,32 +104,71 @@ class Config:
 
     def __init__(self):
         self.cell_size = int(self.CELL_SIZE)
-        self.cols = int(self.GRID_COLS)
-        self.rows = int(self.GRID_ROWS)
-        self.width = self.cols * self.cell_size
-        self.height = self.rows * self.cell_size + 48  # extra space for HUD
+        self.view_cells = max(1, int(self.VIEW_CELLS))
+        self.set_grid(self.GRID_COLS, self.GRID_ROWS)
+        self.level_file = self.LEVEL_FILE
         self.title = self.TITLE
+        self.window_scale = float(self.WINDOW_SCALE)
+        self.scale_mode = self.SCALE_MODE
+        self.render_backend = self.RENDER_BACKEND
+        self.render_accelerated = bool(self.RENDER_ACCELERATED)
+        self.pixel_stack = int(self.PIXEL_STACK)
+        self.pixel_downsample = int(self.PIXEL_DOWNSAMPLE)
         self.bg_color = self.BG_COLOR
         self.grid_color = self.GRID_COLOR
         self.text_color = self.TEXT_COLOR
         self.hud_bg = self.HUD_BG
         self.start_length = int(self.START_LENGTH)
+        self.reachable_spawns = bool(self.REACHABLE_SPAWNS)
         self.fps = int(self.FPS)
+        self.quality_adaptive = bool(self.QUALITY_ADAPTIVE)
+        self.quality_budget_ms = self.QUALITY_BUDGET_MS
+        self.quality_start_tier = min(max(int(self.QUALITY_START_TIER), QUALITY_FULL), QUALITY_MINIMAL)
+        self.spectator_port = self.SPECTATOR_PORT
+        self.spectator_host = self.SPECTATOR_HOST
+        self.spectator_keyframe_ticks = int(self.SPECTATOR_KEYFRAME_TICKS)
+        self.record_dir = self.RECORD_DIR
         self.score_file = self.SCORE_FILE
         self.assets_dir = self.ASSETS_DIR
         self.img_snake_head = self.IMG_SNAKE_HEAD
         self.img_food = self.IMG_FOOD
         self.img_game_over = self.IMG_GAME_OVER
         self.music_file = self.MUSIC_FILE
+        self.sfx_files = dict(self.SFX_FILES)
+        self.sfx_channels = int(self.SFX_CHANNELS)
+        self.sfx_volume = float(self.SFX_VOLUME)
+        self.sfx_cooldown_ms = float(self.SFX_COOLDOWN_MS)
+        self.audio_buffer = int(self.AUDIO_BUFFER)
         self.powerup_assets = dict(self.POWERUP_ASSETS)
         self.powerup_lifetime = int(self.POWERUP_LIFETIME)
         self.difficulties = dict(self.DIFFICULTIES)
         self.characters = dict(self.CHARACTERS)
         self.default_character = self.DEFAULT_CHARACTER
 
-    def grid_to_px(self, pos):
+    def set_grid(self, cols, rows):
+        self.cols = int(cols)
+        self.rows = int(rows)
+        self.view_cols = min(self.cols, self.view_cells)
+        self.view_rows = min(self.rows, self.view_cells)
+        self.width = self.view_cols * self.cell_size
+        self.height = self.view_rows * self.cell_size + 48  # extra space for HUD
+
+    def camera_for(self, pos):
+        """Top-left board cell of a view centred on ``pos``, clamped to the board."""
+        x, y = pos
+        ox = min(max(x - self.view_cols // 2, 0), self.cols - self.view_cols)
+        oy = min(max(y - self.view_rows // 2, 0), self.rows - self.view_rows)
+        return ox, oy
+
+    def in_view(self, pos, camera=(0, 0)):
+        x, y = pos
+        ox, oy = camera
+        return 0 <= x - ox < self.view_cols and 0 <= y - oy < self.view_rows
+
+    def grid_to_px(self, pos, camera=(0, 0)):
         x, y = pos
-        return x * self.cell_size, y * self.cell_size + 48
+        ox, oy = camera
+        return (x - ox) * self.cell_size, (y - oy) * self.cell_size + 48
 
     def get_character(self, name):
         """Return a character definition merged with sensible defaults."""
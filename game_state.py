@@ -0,0 +1,305 @@
+"""
+game_state.py — Compact, surface-free snapshot of a running game.
+
+Cells are packed as ``y * cols + x`` so the snake body is a flat
+``array('I')`` that copies in O(length) and serialises without per-item work.
+"""
+
+from array import array
+from collections import deque
+import struct
+import sys
+
+from food import Food
+from power_up import POWERUP_DEFS
+from snake import Snake
+
+
+STATES = ("menu", "playing", "game_over")
+NO_CELL = 0xFFFFFFFF  # food cell while the food is off the board
+POWERUP_KEYS = tuple(d["key"] for d in POWERUP_DEFS)
+
+_MAGIC = b"BSGS"
+_VERSION = 1
+_HEADER = struct.Struct(
+    "<4sB"  # magic, version
+    "BBB"  # state, difficulty index, character index
+    "HH"  # cols, rows
+    "bb"  # direction
+    "I"  # grow pending
+    "I"  # food cell (NO_CELL = off the board)
+    "bII"  # power-up key index (-1 = none), cell, remaining frames
+    "ii"  # score, high score
+    "hI"  # speed effect delta, timer
+    "II"  # frames since power-up, effect message timer
+    "Bd"  # gauss_next present, gauss_next
+    "IH"  # body length, effect message byte length
+)
+_RNG_WORDS = 625
+_SWAP = sys.byteorder != "little"
+
+
+def _u32(values) -> array:
+    return array("I", values)
+
+
+def _to_le(arr: array) -> bytes:
+    if _SWAP:
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def _from_le(data, count: int) -> array:
+    arr = array("I")
+    arr.frombytes(data[: count * arr.itemsize])
+    if _SWAP:
+        arr.byteswap()
+    return arr
+
+
+class GameState:
+    """Plain-data copy of everything needed to resume a run."""
+
+    __slots__ = (
+        "state",
+        "difficulty",
+        "character",
+        "cols",
+        "rows",
+        "body",
+        "dir",
+        "grow_pending",
+        "food",
+        "power_key",
+        "power_pos",
+        "power_frames",
+        "score",
+        "high_score",
+        "speed_delta",
+        "speed_timer",
+        "frames_since_powerup",
+        "effect_msg_timer",
+        "effect_message",
+        "rng_words",
+        "rng_gauss",
+    )
+
+    def __init__(self, cols: int, rows: int):
+        self.state = 0
+        self.difficulty = 0
+        self.character = 0
+        self.cols = cols
+        self.rows = rows
+        self.body = _u32(())
+        self.dir = (1, 0)
+        self.grow_pending = 0
+        self.food = 0
+        self.power_key = -1
+        self.power_pos = 0
+        self.power_frames = 0
+        self.score = 0
+        self.high_score = 0
+        self.speed_delta = 0
+        self.speed_timer = 0
+        self.frames_since_powerup = 0
+        self.effect_msg_timer = 0
+        self.effect_message = ""
+        self.rng_words = _u32(())
+        self.rng_gauss = None
+
+    def cell(self, pos) -> int:
+        return pos[1] * self.cols + pos[0]
+
+    def pos(self, cell: int):
+        return cell % self.cols, cell // self.cols
+
+    @classmethod
+    def capture(cls, game) -> "GameState":
+        cfg = game.cfg
+        st = cls(cfg.cols, cfg.rows)
+        cols = st.cols
+        st.state = STATES.index(game.state)
+        st.difficulty = game.selected_difficulty
+        st.character = game.selected_character
+        if game.snake is not None:
+            st.body = _u32(y * cols + x for x, y in game.snake.body)
+            st.dir = game.snake.dir
+            st.grow_pending = game.snake.grow_pending
+        if game.food is not None:
+            st.food = NO_CELL if game.food.pos is None else st.cell(game.food.pos)
+        if game.power_up is not None:
+            st.power_key = POWERUP_KEYS.index(game.power_up.definition["key"])
+            st.power_pos = st.cell(game.power_up.pos)
+            st.power_frames = game.power_up.remaining_frames
+        st.score = game.score
+        st.high_score = game.high_score
+        st.speed_delta = game.speed_effect_delta
+        st.speed_timer = game.speed_effect_timer
+        st.frames_since_powerup = game.frames_since_powerup
+        st.effect_msg_timer = game.effect_msg_timer
+        st.effect_message = game.effect_message
+        _, words, st.rng_gauss = game.rng.getstate()
+        st.rng_words = _u32(words)
+        return st
+
+    def apply(self, game):
+        """Restore this state into ``game``, reusing its loaded assets."""
+        cfg = game.cfg
+        if (cfg.cols, cfg.rows) != (self.cols, self.rows):
+            raise ValueError(
+                f"state grid {self.cols}x{self.rows} does not match "
+                f"config grid {cfg.cols}x{cfg.rows}"
+            )
+        game.selected_difficulty = self.difficulty
+        game.selected_character = self.character
+        game.current_difficulty = game.difficulty_names[self.difficulty]
+        game.diff_data = game._load_difficulty(game.current_difficulty)
+        game.base_fps = int(game.diff_data.get("fps", cfg.fps))
+        game.powerup_delay = max(1, int(game.diff_data.get("powerup_delay", 8)))
+        name = game.character_names[self.character]
+        if name != game.current_character_name or game.snake is None:
+            game.current_character_name = name
+            game.current_character_data = cfg.get_character(name)
+            game.snake = Snake(
+                cfg, start=(0, 0), character=game.current_character_data, level=game.level
+            )
+            if game.renders:
+                game.snake.load_assets()
+
+        cols = self.cols
+        game.snake.body = deque((c % cols, c // cols) for c in self.body)
+        game.snake.dir = tuple(self.dir)
+        game.snake.grow_pending = self.grow_pending
+        game.snake.crashed = False
+        game._reset_reach()
+
+        if game.food is None:
+            game.food = Food(cfg, rng=game.rng, level=game.level)
+            if game.renders:
+                game.food.load_assets()
+        game.food.pos = None if self.food == NO_CELL else self.pos(self.food)
+
+        if self.power_key < 0:
+            game.power_up = None
+        else:
+            definition = POWERUP_DEFS[self.power_key]
+            if game.power_up is None or game.power_up.definition is not definition:
+                game.power_up = game._new_power_up()
+                game.power_up.definition = definition
+                if game.power_up.load_art:
+                    game.power_up._load_art()
+            game.power_up.pos = self.pos(self.power_pos)
+            game.power_up.remaining_frames = self.power_frames
+
+        game.state = STATES[self.state]
+        game.game_over = game.state == "game_over"
+        game.score = self.score
+        game.high_score = self.high_score
+        game.speed_effect_delta = self.speed_delta
+        game.speed_effect_timer = self.speed_timer
+        game.frames_since_powerup = self.frames_since_powerup
+        game.effect_msg_timer = self.effect_msg_timer
+        game.effect_message = self.effect_message
+        if self.rng_words:
+            game.rng.setstate((3, tuple(self.rng_words), self.rng_gauss))
+
+    def clone(self) -> "GameState":
+        st = GameState.__new__(GameState)
+        for name in self.__slots__:
+            setattr(st, name, getattr(self, name))
+        st.body = _u32(self.body)
+        st.rng_words = _u32(self.rng_words)
+        return st
+
+    def to_bytes(self) -> bytes:
+        msg = self.effect_message.encode("utf-8")[:0xFFFF]
+        header = _HEADER.pack(
+            _MAGIC,
+            _VERSION,
+            self.state,
+            self.difficulty,
+            self.character,
+            self.cols,
+            self.rows,
+            self.dir[0],
+            self.dir[1],
+            self.grow_pending,
+            self.food,
+            self.power_key,
+            self.power_pos,
+            self.power_frames,
+            self.score,
+            self.high_score,
+            self.speed_delta,
+            self.speed_timer,
+            self.frames_since_powerup,
+            self.effect_msg_timer,
+            self.rng_gauss is not None,
+            self.rng_gauss or 0.0,
+            len(self.body),
+            len(msg),
+        )
+        rng = self.rng_words if self.rng_words else _u32([0] * _RNG_WORDS)
+        return b"".join((header, _to_le(self.body), _to_le(rng), msg))
+
+    @classmethod
+    def from_bytes(cls, data) -> "GameState":
+        view = memoryview(data)
+        if len(view) < _HEADER.size:
+            raise ValueError("truncated game state")
+        (
+            magic,
+            version,
+            state,
+            difficulty,
+            character,
+            cols,
+            rows,
+            dx,
+            dy,
+            grow_pending,
+            food,
+            power_key,
+            power_pos,
+            power_frames,
+            score,
+            high_score,
+            speed_delta,
+            speed_timer,
+            frames_since_powerup,
+            effect_msg_timer,
+            has_gauss,
+            gauss,
+            body_len,
+            msg_len,
+        ) = _HEADER.unpack_from(view)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("not a Batman Snake game state")
+        offset = _HEADER.size
+        expected = offset + 4 * (body_len + _RNG_WORDS) + msg_len
+        if len(view) < expected:
+            raise ValueError("truncated game state")
+        st = cls(cols, rows)
+        st.state = state
+        st.difficulty = difficulty
+        st.character = character
+        st.dir = (dx, dy)
+        st.grow_pending = grow_pending
+        st.food = food
+        st.power_key = power_key
+        st.power_pos = power_pos
+        st.power_frames = power_frames
+        st.score = score
+        st.high_score = high_score
+        st.speed_delta = speed_delta
+        st.speed_timer = speed_timer
+        st.frames_since_powerup = frames_since_powerup
+        st.effect_msg_timer = effect_msg_timer
+        st.rng_gauss = gauss if has_gauss else None
+        st.body = _from_le(view[offset:], body_len)
+        offset += 4 * body_len
+        st.rng_words = _from_le(view[offset:], _RNG_WORDS)
+        offset += 4 * _RNG_WORDS
+        st.effect_message = bytes(view[offset : offset + msg_len]).decode("utf-8", "replace")
+        return st
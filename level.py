@@ -0,0 +1,291 @@
+"""
+level.py — Binary maze levels with walls, portals and optional edge wrap.
+
+A level file is a fixed header, one byte per cell, a portal table and a
+run-length table of spawn-eligible cells, all little-endian and 4-byte
+aligned. ``Level.load`` memory-maps the file and reads those tables in
+place, so opening a large level costs the same as opening a small one
+and processes that load the same file share its pages.
+
+Spawn-eligible cells (floor, not portal) are stored as runs of consecutive
+cell indices with cumulative counts, so a uniform spawn pick is a random
+integer plus a binary search.
+"""
+
+from array import array
+from bisect import bisect_right
+import argparse
+import mmap
+import random
+import re
+import struct
+import sys
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; the spawn fallback scans in Python
+    np = None
+
+
+FLOOR = 0
+WALL = 1
+PORTAL = 2
+
+FLAG_WRAP = 1
+NO_START = 0xFFFFFFFF
+
+_MAGIC = b"BSLV"
+_VERSION = 1
+# magic, version, flags, reserved, cols, rows, start cell, portal entries,
+# spawn runs, spawn cells
+_HEADER = struct.Struct("<4sBBHIIIIII")
+_LITTLE = sys.byteorder == "little"
+_FLOOR_RUNS = re.compile(rb"\x00+")
+
+
+def _align(n: int) -> int:
+    return (n + 3) & ~3
+
+
+def _u32_view(buf, offset: int, count: int):
+    view = memoryview(buf)[offset : offset + 4 * count]
+    if _LITTLE:
+        return view.cast("I")
+    arr = array("I")
+    arr.frombytes(view)
+    arr.byteswap()
+    return arr
+
+
+def _u32_bytes(values) -> bytes:
+    arr = array("I", values)
+    if not _LITTLE:
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def write_level(path, cols: int, rows: int, cells, portals=(), wrap: bool = True, start=None):
+    """Write a level file.
+
+    ``cells`` is a bytes-like grid of ``cols * rows`` FLOOR/WALL values in
+    row-major order; ``portals`` is an iterable of ``((x, y), (x, y))``
+    pairs that link both ways.
+    """
+    grid = bytearray(cells)
+    if len(grid) != cols * rows:
+        raise ValueError(f"expected {cols * rows} cells, got {len(grid)}")
+    links = {}
+    for a, b in portals:
+        ca = a[1] * cols + a[0]
+        cb = b[1] * cols + b[0]
+        grid[ca] = grid[cb] = PORTAL
+        links[ca] = cb
+        links[cb] = ca
+    start_cell = NO_START if start is None else start[1] * cols + start[0]
+
+    starts = array("I")
+    ends = array("I")
+    total = 0
+    for match in _FLOOR_RUNS.finditer(grid):
+        starts.append(match.start())
+        total += match.end() - match.start()
+        ends.append(total)
+
+    header = _HEADER.pack(
+        _MAGIC,
+        _VERSION,
+        FLAG_WRAP if wrap else 0,
+        0,
+        cols,
+        rows,
+        start_cell,
+        len(links),
+        len(starts),
+        total,
+    )
+    pad = b"\0" * (_align(len(grid)) - len(grid))
+    portal_words = [word for pair in sorted(links.items()) for word in pair]
+    with open(path, "wb") as fh:
+        fh.write(header)
+        fh.write(grid)
+        fh.write(pad)
+        fh.write(_u32_bytes(portal_words))
+        fh.write(_u32_bytes(starts))
+        fh.write(_u32_bytes(ends))
+
+
+def cell_indices(positions, cols: int):
+    """NumPy array of ``y * cols + x`` for a collection of positions."""
+    return np.fromiter((y * cols + x for x, y in positions), dtype=np.intp, count=len(positions))
+
+
+class Level:
+    def __init__(self, buf, mm=None):
+        if len(buf) < _HEADER.size:
+            raise ValueError("truncated level file")
+        (
+            magic,
+            version,
+            flags,
+            _,
+            cols,
+            rows,
+            start_cell,
+            portal_count,
+            run_count,
+            spawn_total,
+        ) = _HEADER.unpack_from(buf)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("not a Batman Snake level file")
+        offset = _HEADER.size
+        size = cols * rows
+        if len(buf) < _align(offset + size) + 4 * (2 * portal_count + 2 * run_count):
+            raise ValueError("truncated level file")
+
+        self._mm = mm
+        self.cols = cols
+        self.rows = rows
+        self.wrap = bool(flags & FLAG_WRAP)
+        self.cells = memoryview(buf)[offset : offset + size]
+        offset = _align(offset + size)
+        words = _u32_view(buf, offset, 2 * portal_count)
+        self.portals = {words[i]: words[i + 1] for i in range(0, len(words), 2)}
+        offset += 8 * portal_count
+        self.spawn_starts = _u32_view(buf, offset, run_count)
+        offset += 4 * run_count
+        self.spawn_ends = _u32_view(buf, offset, run_count)
+        self.spawn_total = spawn_total
+        self.start = None if start_cell == NO_START else (start_cell % cols, start_cell // cols)
+        self._spawn_mask = None
+
+    @classmethod
+    def load(cls, path) -> "Level":
+        with open(path, "rb") as fh:
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(mm, mm)
+
+    def close(self):
+        for name in ("cells", "spawn_starts", "spawn_ends"):
+            view = getattr(self, name)
+            if isinstance(view, memoryview):
+                view.release()
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def blocked(self, pos) -> bool:
+        return self.cells[pos[1] * self.cols + pos[0]] == WALL
+
+    def advance(self, pos, d):
+        """Return the cell reached by stepping from ``pos``, or None off an edge."""
+        x = pos[0] + d[0]
+        y = pos[1] + d[1]
+        cols = self.cols
+        rows = self.rows
+        if not (0 <= x < cols and 0 <= y < rows):
+            if not self.wrap:
+                return None
+            x %= cols
+            y %= rows
+        cell = y * cols + x
+        if self.cells[cell] == PORTAL:
+            cell = self.portals.get(cell, cell)
+            return cell % cols, cell // cols
+        return x, y
+
+    def spawn_cell(self, k: int) -> int:
+        """Return the ``k``-th spawn-eligible cell index."""
+        i = bisect_right(self.spawn_ends, k)
+        prev = self.spawn_ends[i - 1] if i else 0
+        return self.spawn_starts[i] + (k - prev)
+
+    def iter_spawn_cells(self):
+        prev = 0
+        for start, end in zip(self.spawn_starts, self.spawn_ends):
+            yield from range(start, start + end - prev)
+            prev = end
+
+    def spawn_cells(self, ks):
+        """Vectorised :meth:`spawn_cell` over a NumPy array of indices."""
+        ends = np.frombuffer(self.spawn_ends, dtype=np.uint32)
+        starts = np.frombuffer(self.spawn_starts, dtype=np.uint32)
+        i = np.searchsorted(ends, ks, side="right")
+        prev = np.where(i > 0, ends[i - 1], 0)
+        return starts[i].astype(np.int64) + (ks - prev)
+
+    def spawn_mask(self):
+        """Cached NumPy mask of spawn-eligible cells, or None without NumPy."""
+        if np is None:
+            return None
+        if self._spawn_mask is None:
+            self._spawn_mask = np.frombuffer(self.cells, dtype=np.uint8) == FLOOR
+        return self._spawn_mask
+
+    def sample_spawn(self, rng, forbidden, tries: int = 32):
+        """Pick a uniform spawn-eligible position not in ``forbidden``."""
+        total = self.spawn_total
+        if not total:
+            return None
+        cols = self.cols
+        for _ in range(tries):
+            cell = self.spawn_cell(rng.randrange(total))
+            pos = (cell % cols, cell // cols)
+            if pos not in forbidden:
+                return pos
+        mask = self.spawn_mask()
+        if mask is not None:
+            free = mask.copy()
+            if forbidden:
+                free[cell_indices(forbidden, cols)] = False
+            cells = np.flatnonzero(free)
+            if not len(cells):
+                return None
+            cell = int(cells[rng.randrange(len(cells))])
+            return cell % cols, cell // cols
+        free = [
+            (cell % cols, cell // cols)
+            for cell in self.iter_spawn_cells()
+            if (cell % cols, cell // cols) not in forbidden
+        ]
+        return rng.choice(free) if free else None
+
+
+def generate_maze(cols: int, rows: int, seed=None) -> bytearray:
+    """Carve a perfect maze with a randomised depth-first search."""
+    rng = random.Random(seed)
+    grid = bytearray([WALL]) * (cols * rows)
+    if cols < 3 or rows < 3:
+        return grid
+    stack = [(1, 1)]
+    grid[cols + 1] = FLOOR
+    while stack:
+        x, y = stack[-1]
+        options = []
+        for dx, dy in ((2, 0), (-2, 0), (0, 2), (0, -2)):
+            nx, ny = x + dx, y + dy
+            if 0 < nx < cols - 1 and 0 < ny < rows - 1 and grid[ny * cols + nx] == WALL:
+                options.append((nx, ny, dx, dy))
+        if not options:
+            stack.pop()
+            continue
+        nx, ny, dx, dy = rng.choice(options)
+        grid[(y + dy // 2) * cols + x + dx // 2] = FLOOR
+        grid[ny * cols + nx] = FLOOR
+        stack.append((nx, ny))
+    return grid
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a Batman Snake maze level.")
+    parser.add_argument("path")
+    parser.add_argument("cols", type=int)
+    parser.add_argument("rows", type=int)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--no-wrap", action="store_true", help="edges are deadly")
+    args = parser.parse_args(argv)
+    grid = generate_maze(args.cols, args.rows, args.seed)
+    write_level(args.path, args.cols, args.rows, grid, wrap=not args.no_wrap, start=(1, 1))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,9 @@ from typing import Iterable, Tuple, Optional
 
 import pygame
 
+from quality import QUALITY_LOW
+from render import load_image
+
 
 Vec2 = Tuple[int, int]
 
@@ -35,8 +38,11 @@ POWERUP_DEFS = (
 class PowerUp:
     """Spawnable Gotham-themed modifiers that affect the run."""
 
-    def __init__(self, config):
+    def __init__(self, config, rng=None, load_art: bool = True, level=None):
         self.config = config
+        self.rng = rng or random
+        self.level = level
+        self.load_art = load_art
         self.definition = POWERUP_DEFS[0]
         self.pos: Vec2 = (0, 0)
         self.img = None
@@ -56,8 +62,9 @@ class PowerUp:
         return self.definition
 
     def _choose_definition(self):
-        self.definition = random.choice(POWERUP_DEFS)
-        self._load_art()
+        self.definition = self.rng.choice(POWERUP_DEFS)
+        if self.load_art:
+            self._load_art()
 
     def _load_art(self):
         asset_map = getattr(self.config, "powerup_assets", {})
@@ -67,25 +74,37 @@ class PowerUp:
             return
         path = f"{self.config.assets_dir}/{asset_name}"
         try:
-            img = pygame.image.load(path).convert_alpha()
+            img = load_image(path)
             self.img = pygame.transform.smoothscale(
                 img, (self.config.cell_size, self.config.cell_size)
             )
         except Exception:
             self.img = None
 
-    def spawn(self, forbidden: Iterable[Vec2], lifetime_frames: int) -> bool:
+    def spawn(self, forbidden: Iterable[Vec2], lifetime_frames: int, reach=None) -> bool:
         self._choose_definition()
         blocked = set(forbidden)
-        free = [
-            (x, y)
-            for x in range(self.config.cols)
-            for y in range(self.config.rows)
-            if (x, y) not in blocked
-        ]
-        if not free:
-            return False
-        self.pos = random.choice(free)
+        if reach is not None:
+            # Only the head's region counts; sealed pockets never get one.
+            pos = reach.sample(self.rng, blocked)
+            if pos is None:
+                return False
+            self.pos = pos
+        elif self.level is not None:
+            pos = self.level.sample_spawn(self.rng, blocked)
+            if pos is None:
+                return False
+            self.pos = pos
+        else:
+            free = [
+                (x, y)
+                for x in range(self.config.cols)
+                for y in range(self.config.rows)
+                if (x, y) not in blocked
+            ]
+            if not free:
+                return False
+            self.pos = self.rng.choice(free)
         self.remaining_frames = max(0, int(lifetime_frames))
         self.spawn_tick = pygame.time.get_ticks()
         return True
@@ -96,35 +115,37 @@ class PowerUp:
         self.remaining_frames -= 1
         return self.remaining_frames > 0
 
-    def draw(self, surf: pygame.Surface, tick_ms: Optional[int] = None):
+    def draw(self, canvas, tick_ms: Optional[int] = None, quality: int = 0, camera=(0, 0)):
         if tick_ms is None:
             tick_ms = pygame.time.get_ticks()
-        px, py = self.config.grid_to_px(self.pos)
+        if not self.config.in_view(self.pos, camera):
+            return
+        px, py = self.config.grid_to_px(self.pos, camera)
         cs = self.config.cell_size
         wobble = math.sin((tick_ms / 200.0) + self.pos[0] * 0.5)
         offset = int(wobble * 3)
         rect = pygame.Rect(px, py + offset, cs, cs)
+        effects = quality < QUALITY_LOW
         timer_ratio = 1.0
         if self.remaining_frames > 0:
             timer_ratio = max(0.0, min(1.0, self.remaining_frames / max(1, self.config.fps * self.config.powerup_lifetime)))
-        ring_radius = int(cs * (0.6 + 0.25 * math.sin((tick_ms / 140.0) + self.pos[1])))
-        pygame.draw.circle(
-            surf,
-            tuple(min(255, int(c + 40)) for c in self.definition["color"]),
-            (rect.centerx, rect.centery),
-            ring_radius,
-            width=2,
-        )
+        if effects:
+            ring_radius = int(cs * (0.6 + 0.25 * math.sin((tick_ms / 140.0) + self.pos[1])))
+            canvas.circle(
+                tuple(min(255, int(c + 40)) for c in self.definition["color"]),
+                (rect.centerx, rect.centery),
+                ring_radius,
+                width=2,
+            )
         if self.img is not None:
-            surf.blit(self.img, rect)
+            canvas.blit(self.img, rect)
         else:
-            pygame.draw.rect(surf, self.definition["color"], rect, border_radius=6)
-            pygame.draw.rect(surf, (30, 30, 30), rect, width=2, border_radius=6)
-        if timer_ratio < 1.0:
+            canvas.rect(self.definition["color"], rect, radius=6)
+            canvas.rect((30, 30, 30), rect, radius=6, width=2)
+        if effects and timer_ratio < 1.0:
             # Draw shrinking timer halo
             halo_radius = int(cs * (0.9 * timer_ratio + 0.2))
-            pygame.draw.circle(
-                surf,
+            canvas.circle(
                 (220, 220, 220),
                 (rect.centerx, rect.centery),
                 max(halo_radius, cs // 3),
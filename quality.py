@@ -0,0 +1,87 @@
+"""
+quality.py — Adaptive quality governor that protects the frame budget.
+
+Draw code receives an integer tier and skips cosmetic work at or above the
+tiers below. The governor steps one tier at a time, waits ``cooldown``
+frames after every change, and uses separate degrade/recover thresholds so
+it does not flap around the budget.
+"""
+
+from collections import deque
+import time
+
+
+QUALITY_FULL = 0
+QUALITY_REDUCED = 1  # static grid colour, fixed-size food glow
+QUALITY_LOW = 2  # no segment pulses, power-up rings or timer halos
+QUALITY_MINIMAL = 3  # flat segment colours, no food glow, no grid lines
+TIER_NAMES = ("full", "reduced", "low", "minimal")
+
+
+class QualityGovernor:
+    def __init__(
+        self,
+        budget_ms: float,
+        window: int = 30,
+        degrade_ratio: float = 0.85,
+        recover_ratio: float = 0.5,
+        cooldown: int = 60,
+        start_tier: int = QUALITY_FULL,
+        max_tier: int = QUALITY_MINIMAL,
+        clock=time.perf_counter,
+    ):
+        self.budget_ms = float(budget_ms)
+        self.degrade_ratio = degrade_ratio
+        self.recover_ratio = recover_ratio
+        self.cooldown = int(cooldown)
+        self.max_tier = int(max_tier)
+        self.tier = max(QUALITY_FULL, min(self.max_tier, int(start_tier)))
+        self.samples: deque = deque(maxlen=max(1, int(window)))
+        self._sum = 0.0
+        self._since_change = 0
+        self._clock = clock
+        self._last = None
+        self._tier_seconds = [0.0] * (self.max_tier + 1)
+        self.changes = 0
+
+    @property
+    def tier_name(self) -> str:
+        return TIER_NAMES[self.tier]
+
+    def average_ms(self) -> float:
+        return self._sum / len(self.samples) if self.samples else 0.0
+
+    def record(self, frame_ms: float, budget_ms=None) -> int:
+        """Feed one frame's work time and return the tier for the next frame."""
+        now = self._clock()
+        if self._last is not None:
+            self._tier_seconds[self.tier] += now - self._last
+        self._last = now
+        if budget_ms is not None:
+            self.budget_ms = float(budget_ms)
+
+        if len(self.samples) == self.samples.maxlen:
+            self._sum -= self.samples[0]
+        self.samples.append(frame_ms)
+        self._sum += frame_ms
+        self._since_change += 1
+        if self._since_change < self.cooldown or len(self.samples) < self.samples.maxlen:
+            return self.tier
+
+        avg = self.average_ms()
+        if avg > self.budget_ms * self.degrade_ratio and self.tier < self.max_tier:
+            self._set_tier(self.tier + 1)
+        elif avg < self.budget_ms * self.recover_ratio and self.tier > QUALITY_FULL:
+            self._set_tier(self.tier - 1)
+        return self.tier
+
+    def _set_tier(self, tier: int):
+        self.tier = tier
+        self.changes += 1
+        self._since_change = 0
+        self.samples.clear()
+        self._sum = 0.0
+
+    def tier_times(self) -> dict:
+        """Seconds spent in each tier, keyed by tier name."""
+        return {TIER_NAMES[i]: secs for i, secs in enumerate(self._tier_seconds)}
@@ -0,0 +1,476 @@
+"""
+reachability.py — Incremental connectivity of free cells for fair spawning.
+
+Free cells are grouped with a union-find. When the tail frees a cell it gets
+a fresh node that is merged with its free neighbours. When the head fills a
+cell, a local test on the 8 cells around it decides whether the board could
+have split. Only then is the structure marked dirty, and it is rebuilt
+lazily before the next spawn. A full rebuild also runs once the node pool
+has grown to twice the board size. With NumPy available the rebuild is
+vectorised (min-label hooking plus pointer jumping).
+
+On boards of ``BACKGROUND_CELLS`` or more, rebuilds run on a background
+thread from a snapshot of the occupancy, so no tick waits for one. Until the
+new labels are in, queries answer from the current ones, which can only be
+over-connected. Cells filled or freed meanwhile are journalled and replayed
+onto the new labels when they are installed.
+
+Spawns are drawn from the regions that touch the head, so food and power-ups
+never land in pockets the snake has already sealed off.
+"""
+
+from array import array
+import threading
+
+from level import FLOOR, cell_indices
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; rebuilds fall back to pure Python
+    np = None
+
+
+BACKGROUND_CELLS = 1 << 18  # boards this large rebuild off the game tick
+FLOOD_LIMIT = 4096  # head regions up to this size are flood-filled, not scanned
+SAMPLE_BATCH = 1 << 16  # vectorised random picks tried before a full scan
+
+# Clockwise ring around a cell, starting north; even indices are 4-neighbours.
+_RING = ((0, -1), (1, -1), (1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1))
+
+
+class _Job:
+    def __init__(self):
+        self.thread = None
+        self.cancelled = False
+        self.result = None
+
+    def run(self, labels, free):
+        self.result = labels(free, self)
+
+
+class ReachabilityTracker:
+    def __init__(self, cols: int, rows: int, level=None, wrap: bool = True):
+        self.cols = cols
+        self.rows = rows
+        self.level = level
+        self.wrap = level.wrap if level is not None else wrap
+        self.size = cols * rows
+        # Occupancy count per cell: walls are pinned at 255, snake segments add 1.
+        self.occ = bytearray(self.size)
+        if level is not None:
+            self.occ[:] = bytes(level.cells).translate(bytes([0, 255, 0]) + bytes(253))
+        self._walls = bytes(self.occ)
+        self.node = array("i", [-1]) * self.size
+        self.parent = array("i")
+        self.head = None
+        self.dirty = True
+        self.rebuilds = 0
+        self.background = np is not None and self.size >= BACKGROUND_CELLS
+        self._job = None  # in-flight background rebuild
+        self._journal = None  # (cell, freed) transitions since the job's snapshot
+
+    # -- grid helpers -------------------------------------------------
+    def _offset(self, cell: int, dx: int, dy: int) -> int:
+        cols = self.cols
+        x = cell % cols + dx
+        y = cell // cols + dy
+        if not (0 <= x < cols and 0 <= y < self.rows):
+            if not self.wrap:
+                return -1
+            x %= cols
+            y %= self.rows
+        return y * cols + x
+
+    def _neighbours(self, cell: int):
+        for dx, dy in ((0, -1), (1, 0), (0, 1), (-1, 0)):
+            n = self._offset(cell, dx, dy)
+            if n >= 0:
+                yield n
+        if self.level is not None and self.level.portals:
+            exit_cell = self.level.portals.get(cell)
+            if exit_cell is not None:
+                yield exit_cell
+
+    # -- union-find ---------------------------------------------------
+    def _find(self, n: int) -> int:
+        parent = self.parent
+        while parent[n] != n:
+            parent[n] = parent[parent[n]]
+            n = parent[n]
+        return n
+
+    def _union(self, a: int, b: int):
+        ra = self._find(a)
+        rb = self._find(b)
+        if ra != rb:
+            # Newer nodes hang off older roots, keeping trees shallow.
+            if ra < rb:
+                self.parent[rb] = ra
+            else:
+                self.parent[ra] = rb
+
+    def _new_node(self, cell: int) -> int:
+        nid = len(self.parent)
+        self.parent.append(nid)
+        self.node[cell] = nid
+        return nid
+
+    def rebuild(self, body=None):
+        """Recompute all regions from scratch (O(cells))."""
+        self._cancel()
+        if body is not None:
+            self.head = body[0] if body else None
+        if np is not None:
+            self._rebuild_numpy(body)
+        else:
+            self._rebuild_python(body)
+        self.dirty = False
+        self.rebuilds += 1
+
+    def reset(self, body):
+        """Start over for a new run; large boards relabel in the background."""
+        if not self.background:
+            self.rebuild(body)
+            return
+        self._cancel()
+        self.head = body[0] if body else None
+        free = self._count_body(body) == 0
+        # Placeholder labels until the real ones arrive: every free cell
+        # shares node 0, a single region.
+        self.parent = array("i", [0])
+        np.subtract(free, 1, out=np.frombuffer(self.node, dtype=np.intc), casting="unsafe")
+        self.dirty = True
+        self._start_job()
+
+    def _count_body(self, body):
+        self.occ[:] = self._walls
+        occ = np.frombuffer(self.occ, dtype=np.uint8)
+        if body:
+            cols = self.cols
+            cells = np.fromiter((y * cols + x for x, y in body), dtype=np.intp, count=len(body))
+            cells, counts = np.unique(cells, return_counts=True)
+            keep = occ[cells] != 255
+            occ[cells[keep]] = np.minimum(counts[keep], 254)
+        return occ
+
+    def _rebuild_python(self, body):
+        occ = self.occ
+        if body is not None:
+            occ[:] = self._walls
+            for x, y in body:
+                c = y * self.cols + x
+                if occ[c] < 254:
+                    occ[c] += 1
+        self.parent = array("i", range(self.size))
+        node = self.node
+        for c in range(self.size):
+            node[c] = c if occ[c] == 0 else -1
+        for c in range(self.size):
+            if occ[c]:
+                continue
+            for n in self._neighbours(c):
+                if not occ[n]:
+                    self._union(c, n)
+
+    def _rebuild_numpy(self, body):
+        if body is not None:
+            occ = self._count_body(body)
+        else:
+            occ = np.frombuffer(self.occ, dtype=np.uint8)
+        self.parent, self.node = self._labels(occ == 0)
+
+    def _labels(self, free, job=None):
+        """Union-find arrays (parent, node) for the ``free`` mask.
+
+        Returns None if ``job`` is cancelled part-way.
+        """
+        a, b = self._free_edges(free)
+        labels = np.arange(self.size, dtype=np.intc)
+        while len(a):
+            if job is not None and job.cancelled:
+                return None
+            la = labels[a]
+            lb = labels[b]
+            split = la != lb
+            a, b, la, lb = a[split], b[split], la[split], lb[split]
+            if not len(a):
+                break
+            # Labels are roots here: hook each larger root under the smallest
+            # root it touches, flatten the hooked roots among themselves, and
+            # then point every cell at its new root with one gather.
+            np.minimum.at(labels, np.maximum(la, lb), np.minimum(la, lb))
+            touched = np.zeros(self.size, dtype=bool)
+            touched[la] = touched[lb] = True
+            roots = np.flatnonzero(touched)
+            parents = labels[roots]
+            while True:
+                up = labels[parents]
+                if np.array_equal(up, parents):
+                    break
+                labels[roots] = parents = up
+            labels = labels[labels]
+        parent = array("i", [0]) * self.size
+        np.frombuffer(parent, dtype=np.intc)[:] = labels
+        node = array("i", [-1]) * self.size
+        np.copyto(np.frombuffer(node, dtype=np.intc), np.arange(self.size, dtype=np.intc), where=free)
+        return parent, node
+
+    # -- background rebuilds ------------------------------------------
+    def _start_job(self):
+        job = _Job()
+        free = np.frombuffer(self.occ, dtype=np.uint8) == 0
+        job.thread = threading.Thread(
+            target=job.run, args=(self._labels, free), name="reach-rebuild", daemon=True
+        )
+        self._job = job
+        self._journal = []
+        job.thread.start()
+
+    def _cancel(self):
+        if self._job is not None:
+            self._job.cancelled = True
+        self._job = None
+        self._journal = None
+
+    def _poll(self):
+        """Install finished background labels, or start a rebuild if needed."""
+        job = self._job
+        if job is None:
+            if self.dirty and self.background:
+                self._start_job()
+            return
+        if job.thread.is_alive():
+            return
+        journal = self._journal
+        self._job = None
+        self._journal = None
+        if job.result is None:
+            self.dirty = True
+            return
+        self.parent, self.node = job.result
+        self.dirty = False
+        self.rebuilds += 1
+        # Replay what the snake did while the job ran. Neighbour freeness is
+        # read from ``node`` so each step sees the board as it was then.
+        for cell, freed in journal:
+            if freed:
+                self._link(cell)
+            else:
+                self.node[cell] = -1
+                if not self.dirty and self._may_split(cell):
+                    self.dirty = True
+        if len(self.parent) >= 2 * self.size:
+            self.dirty = True
+
+    def _free_edges(self, free):
+        """Index pairs of free cells joined by a step or a portal."""
+        rows, cols = self.rows, self.cols
+        grid = free.reshape(rows, cols)
+        idx = np.arange(self.size, dtype=np.intc).reshape(rows, cols)
+        heads, tails = [], []
+        for axis in (0, 1):
+            if self.wrap:
+                a, b = idx, np.roll(idx, -1, axis)
+                both = grid & np.roll(grid, -1, axis)
+            else:
+                a = idx[:-1] if axis == 0 else idx[:, :-1]
+                b = idx[1:] if axis == 0 else idx[:, 1:]
+                both = (grid[:-1] & grid[1:]) if axis == 0 else (grid[:, :-1] & grid[:, 1:])
+            heads.append(a[both])
+            tails.append(b[both])
+        if self.level is not None and self.level.portals:
+            links = np.array(list(self.level.portals.items()), dtype=np.intc)
+            links = links[free[links[:, 0]] & free[links[:, 1]]]
+            heads.append(links[:, 0])
+            tails.append(links[:, 1])
+        return np.concatenate(heads), np.concatenate(tails)
+
+    # -- incremental updates ------------------------------------------
+    def occupy(self, pos):
+        """Fill ``pos`` with the snake's new head."""
+        self.head = pos
+        cell = pos[1] * self.cols + pos[0]
+        occ = self.occ
+        if occ[cell] >= 254:
+            return
+        occ[cell] += 1
+        if occ[cell] > 1:
+            return
+        if self._journal is not None:
+            self._journal.append((cell, False))
+        self.node[cell] = -1
+        if not self.dirty and self._may_split(cell):
+            self.dirty = True
+
+    def release(self, pos):
+        """Free ``pos`` after the tail leaves it."""
+        cell = pos[1] * self.cols + pos[0]
+        occ = self.occ
+        if occ[cell] == 0 or occ[cell] >= 254:
+            return
+        occ[cell] -= 1
+        if occ[cell]:
+            return
+        if self._journal is not None:
+            self._journal.append((cell, True))
+        if len(self.parent) >= 2 * self.size:
+            self.dirty = True
+        if self.dirty:
+            return
+        self._link(cell)
+
+    def _link(self, cell: int):
+        nid = self._new_node(cell)
+        node = self.node
+        for n in self._neighbours(cell):
+            if node[n] >= 0:
+                self._union(nid, node[n])
+
+    def _may_split(self, cell: int) -> bool:
+        """Conservatively report whether filling ``cell`` can disconnect regions."""
+        if self.level is not None and cell in self.level.portals:
+            return True
+        node = self.node
+        ring = [self._offset(cell, dx, dy) for dx, dy in _RING]
+        free = [r >= 0 and node[r] >= 0 for r in ring]
+        if sum(free[0::2]) <= 1:
+            return False
+        if all(free):
+            return False
+        # Walk the ring from a blocked cell, counting arcs of consecutive free
+        # cells that contain a 4-neighbour. Two such arcs may be disconnected.
+        start = free.index(False)
+        arcs = 0
+        in_arc = touches = False
+        for step in range(1, 9):
+            j = (start + step) % 8
+            if free[j]:
+                if not in_arc:
+                    in_arc, touches = True, False
+                touches = touches or j % 2 == 0
+            elif in_arc:
+                arcs += touches
+                in_arc = False
+        return arcs > 1
+
+    # -- queries ------------------------------------------------------
+    def head_roots(self) -> set:
+        if self.head is None:
+            return set()
+        cell = self.head[1] * self.cols + self.head[0]
+        if self.background:
+            self._poll()
+        elif self.dirty:
+            self.rebuild()
+        node = self.node
+        return {self._find(node[n]) for n in self._neighbours(cell) if node[n] >= 0}
+
+    def reachable(self, pos, roots) -> bool:
+        cell = pos[1] * self.cols + pos[0]
+        nid = self.node[cell]
+        return nid >= 0 and self._find(nid) in roots
+
+    def sample(self, rng, forbidden, tries: int = 64):
+        """Pick a free cell reachable from the head and not in ``forbidden``."""
+        roots = self.head_roots()
+        if not roots:
+            return None
+        cols = self.cols
+        level = self.level
+        for _ in range(tries):
+            if level is not None:
+                if not level.spawn_total:
+                    return None
+                cell = level.spawn_cell(rng.randrange(level.spawn_total))
+            else:
+                cell = rng.randrange(self.size)
+            pos = (cell % cols, cell // cols)
+            if pos not in forbidden and self.reachable(pos, roots):
+                return pos
+        # Random picks keep missing, so the head's region is a small share of
+        # the board: flood-fill it if it is small, else try a large batch of
+        # random picks at once, and only then scan the whole board.
+        region = self._flood(FLOOD_LIMIT)
+        if region is not None:
+            spawnable = level.cells if level is not None else None
+            free = []
+            for c in sorted(region):
+                pos = (c % cols, c // cols)
+                if (spawnable is None or spawnable[c] == FLOOR) and pos not in forbidden:
+                    free.append(pos)
+            return rng.choice(free) if free else None
+        if np is not None:
+            pos = self._sample_batch(rng, forbidden, roots)
+            return pos if pos is not None else self._sample_scan(rng, forbidden, roots)
+        cells = level.iter_spawn_cells() if level is not None else range(self.size)
+        free = []
+        for c in cells:
+            pos = (c % cols, c // cols)
+            if pos not in forbidden and self.reachable(pos, roots):
+                free.append(pos)
+        return rng.choice(free) if free else None
+
+    def _flood(self, limit: int):
+        """Free cells connected to the head, or None past ``limit`` cells."""
+        node = self.node
+        start = self.head[1] * self.cols + self.head[0]
+        seen = {start}
+        stack = [start]
+        while stack:
+            for n in self._neighbours(stack.pop()):
+                if n not in seen and node[n] >= 0:
+                    if len(seen) > limit:
+                        return None
+                    seen.add(n)
+                    stack.append(n)
+        seen.discard(start)
+        return seen
+
+    def _sample_batch(self, rng, forbidden, roots):
+        """Check ``SAMPLE_BATCH`` uniform picks at once; the first hit is uniform too."""
+        picks = np.random.default_rng(rng.getrandbits(64))
+        level = self.level
+        if level is not None:
+            cells = level.spawn_cells(picks.integers(0, level.spawn_total, SAMPLE_BATCH))
+        else:
+            cells = picks.integers(0, self.size, SAMPLE_BATCH)
+        node = np.frombuffer(self.node, dtype=np.intc)
+        parent = np.frombuffer(self.parent, dtype=np.intc)
+        found = node[cells]
+        keep = found >= 0
+        cells, found = cells[keep], found[keep]
+        while True:
+            up = parent[found]
+            if np.array_equal(up, found):
+                break
+            found = parent[up]
+        cells = cells[np.isin(found, np.fromiter(roots, dtype=np.intc, count=len(roots)))]
+        if forbidden and len(cells):
+            cells = cells[~np.isin(cells, cell_indices(forbidden, self.cols))]
+        if not len(cells):
+            return None
+        cell = int(cells[0])
+        return cell % self.cols, cell // self.cols
+
+    def _sample_scan(self, rng, forbidden, roots):
+        """Vectorised fallback for ``sample``: scan every candidate cell at once."""
+        cols = self.cols
+        node = np.frombuffer(self.node, dtype=np.intc)
+        parent = np.frombuffer(self.parent, dtype=np.intc)
+        free = node >= 0
+        if self.level is not None:
+            free &= self.level.spawn_mask()
+        if forbidden:
+            free[cell_indices(forbidden, cols)] = False
+        cells = np.flatnonzero(free)
+        found = node[cells]
+        while True:
+            up = parent[found]
+            if np.array_equal(up, found):
+                break
+            found = parent[up]
+        cells = cells[np.isin(found, np.fromiter(roots, dtype=np.intc, count=len(roots)))]
+        if not len(cells):
+            return None
+        cell = int(cells[rng.randrange(len(cells))])
+        return cell % cols, cell // cols
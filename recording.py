@@ -0,0 +1,127 @@
+"""
+recording.py — Record each run as a compact session file.
+
+A session file holds one run, from start to death or a return to the menu.
+It is a fixed header, then the run's opening keyframe (the spectator
+``K`` frame: tick and ``GameState``), then one fixed-size
+:data:`spectator.DELTA` record per tick that changed something. Every
+delta record has the same size, so readers can map the delta block
+straight into a NumPy structured array (see ``analytics.py``).
+The delta count is derived from the file size, so a run cut short by a
+crash is still readable.
+"""
+
+import os
+import struct
+import time
+
+from spectator import DELTA, EV_DEATH, TickPublisher
+
+
+_MAGIC = b"BSRC"
+_VERSION = 1
+# magic, version, reserved, cols, rows, base fps, powerup delay (s),
+# keyframe bytes, delta records, difficulty, character
+HEADER = struct.Struct("<4sBBHHHHII24s24s")
+_COUNT_AT = struct.calcsize("<4sBBHHHHI")
+SUFFIX = ".bsr"
+
+
+def _name(text: str) -> bytes:
+    # Cut to the 24-byte field on a character boundary, never mid-sequence.
+    return text.encode("utf-8")[:24].decode("utf-8", "ignore").encode("utf-8")
+
+
+def read_header(buf) -> dict:
+    """Decode a session header; ``deltas`` is the byte offset of the delta block.
+
+    Raises ``ValueError`` for anything that is not a readable session file.
+    """
+    if len(buf) < HEADER.size:
+        raise ValueError("truncated session header")
+    (magic, version, _, cols, rows, fps, delay, key_len, _, difficulty, character) = (
+        HEADER.unpack_from(buf)
+    )
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError("not a Batman Snake session file")
+    offset = HEADER.size + key_len
+    if offset > len(buf):
+        raise ValueError("truncated session keyframe")
+    return {
+        "cols": cols,
+        "rows": rows,
+        "fps": fps,
+        "powerup_delay": delay,
+        "difficulty": difficulty.rstrip(b"\0").decode("utf-8", "replace"),
+        "character": character.rstrip(b"\0").decode("utf-8", "replace"),
+        "keyframe": (HEADER.size, key_len),
+        "deltas": offset,
+        "count": (len(buf) - offset) // DELTA.size,
+    }
+
+
+class SessionRecorder:
+    """Write one session file per run of ``game`` into ``directory``."""
+
+    def __init__(self, directory):
+        self.directory = str(directory)
+        os.makedirs(self.directory, exist_ok=True)
+        self.publisher = TickPublisher(self._sink, keyframe_ticks=1 << 30)
+        self.file = None
+        self.path = None
+        self.deltas = 0
+        self.runs = 0
+        self._game = None
+
+    def on_tick(self, game):
+        self._game = game
+        if game.state == "menu" and self.file is not None:
+            self.finish()
+        self.publisher.on_tick(game)
+
+    def _sink(self, payload: bytes, keyframe: bool):
+        if keyframe:
+            self.finish()
+            self._open(payload)
+            return
+        if self.file is None:
+            return
+        self.file.write(payload)
+        self.deltas += 1
+        if DELTA.unpack(payload)[2] & EV_DEATH:
+            self.finish()
+
+    def _open(self, keyframe: bytes):
+        game = self._game
+        self.runs += 1
+        self.path = os.path.join(
+            self.directory,
+            f"session-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self.runs}{SUFFIX}",
+        )
+        self.file = open(self.path, "wb")
+        self.deltas = 0
+        self.file.write(
+            HEADER.pack(
+                _MAGIC,
+                _VERSION,
+                0,
+                game.cfg.cols,
+                game.cfg.rows,
+                game.base_fps,
+                game.powerup_delay,
+                len(keyframe),
+                0,
+                _name(game.current_difficulty),
+                _name(game.current_character_name),
+            )
+        )
+        self.file.write(keyframe)
+
+    def finish(self):
+        """Close the current run, patching its delta count into the header."""
+        if self.file is None:
+            return
+        self.file.seek(_COUNT_AT)
+        self.file.write(struct.pack("<I", self.deltas))
+        self.file.close()
+        self.file = None
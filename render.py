@@ -0,0 +1,292 @@
+"""
+render.py — Drawing backends behind one small canvas interface.
+
+Game code draws through a canvas (``blit``, ``rect``, ``circle``, ``line``,
+``text``) instead of calling ``pygame.draw`` on a Surface directly:
+
+* ``SurfaceCanvas`` is the software path: it draws into a Surface and
+  presents it through a :class:`viewport.Viewport`.
+* ``OffscreenCanvas`` draws into a ring of NumPy-backed Surfaces for
+  pixel observations, with no window at all.
+* ``TextureCanvas`` uses ``pygame._sdl2.video`` ``Renderer``/``Texture``.
+  Sprites and cached text are uploaded once and drawn as texture copies.
+  Coloured rounded rects and circles are drawn by tinting cached white
+  sprites, and SDL batches the copies made within a frame. It also works
+  with SDL's software renderer (``accelerated=False``).
+"""
+
+from collections import OrderedDict
+import os
+import weakref
+
+import pygame
+
+
+TEXT_CACHE_LIMIT = 512
+TEXTURE_CACHE_LIMIT = 1024  # surfaces with an uploaded texture; least recently drawn go first
+
+
+def load_image(path, alpha: bool = True) -> pygame.Surface:
+    """Load an image, converting it for fast blits when a display surface exists."""
+    img = pygame.image.load(str(path))
+    if pygame.display.get_surface() is None:
+        # No display format to match (e.g. texture backend): normalise to 32-bit.
+        out = pygame.Surface(img.get_size(), pygame.SRCALPHA if alpha else 0, 32)
+        out.blit(img, (0, 0))
+        return out
+    return img.convert_alpha() if alpha else img.convert()
+
+
+def _rgba(color):
+    color = tuple(color)
+    return color if len(color) == 4 else color[:3] + (255,)
+
+
+def _topleft_rect(image_size, dest, size=None) -> pygame.Rect:
+    if isinstance(dest, pygame.Rect):
+        x, y = dest.topleft
+    else:
+        x, y = dest[0], dest[1]
+    w, h = size or image_size
+    return pygame.Rect(x, y, w, h)
+
+
+class Canvas:
+    """Shared text cache; subclasses implement the drawing primitives."""
+
+    width = 0
+    height = 0
+
+    def __init__(self):
+        self._text = {}
+
+    def text(self, font, text: str, color) -> pygame.Surface:
+        key = (id(font), text, tuple(color))
+        surf = self._text.get(key)
+        if surf is None:
+            if len(self._text) >= TEXT_CACHE_LIMIT:
+                self._text.clear()
+            surf = font.render(text, True, color)
+            self._text[key] = surf
+        return surf
+
+    def new_surface(self, size) -> pygame.Surface:
+        """An opaque Surface in the pixel format that blits fastest onto this canvas."""
+        return pygame.Surface(size, 0, 32)
+
+    def resize(self, size):
+        pass
+
+
+class SurfaceCanvas(Canvas):
+    def __init__(self, surface: pygame.Surface, viewport=None):
+        super().__init__()
+        self.surface = surface
+        self.viewport = viewport
+        self.width, self.height = surface.get_size()
+
+    def new_surface(self, size) -> pygame.Surface:
+        return pygame.Surface(size, 0, self.surface)
+
+    def fill(self, color):
+        self.surface.fill(color)
+
+    def blit(self, image: pygame.Surface, dest, size=None, alpha=None):
+        if size is not None and tuple(size) != image.get_size():
+            image = pygame.transform.smoothscale(image, size)
+        if alpha is not None:
+            image.set_alpha(alpha)
+        self.surface.blit(image, dest)
+
+    def rect(self, color, rect, radius: int = 0, width: int = 0):
+        if radius <= 0 and width == 0:
+            # Same pixels as draw.rect (neither blends), without its overhead.
+            self.surface.fill(color, rect)
+            return
+        pygame.draw.rect(self.surface, color, rect, width=width, border_radius=radius)
+
+    def circle(self, color, center, radius: int, width: int = 0):
+        pygame.draw.circle(self.surface, color, center, radius, width=width)
+
+    def line(self, color, start, end):
+        pygame.draw.line(self.surface, color, start, end)
+
+    def resize(self, size):
+        if self.viewport is not None:
+            self.viewport.resize(size)
+
+    def present(self):
+        if self.viewport is not None:
+            self.viewport.present(self.surface)
+
+
+class OffscreenCanvas(SurfaceCanvas):
+    """Draw into NumPy-backed frames with no window.
+
+    Every frame slot is a Surface made with ``pygame.image.frombuffer`` over
+    one slice of a ``(slots, height, width, 4)`` BGRA array, so drawing
+    writes straight into memory NumPy can read without locking or copying.
+    With ``stack > 1`` the slots form a ring with room for ``ring`` stacks.
+    When the ring is full, the last ``stack - 1`` frames are copied back to
+    the front, so each stack stays one contiguous slice.
+    ``frames()`` returns views, downsampled by striding, that stay valid
+    until the next frame is rendered.
+    """
+
+    def __init__(self, size, stack: int = 1, downsample: int = 1, ring: int = 4, rgb: bool = True):
+        import numpy as np
+
+        width, height = size
+        self.stack = max(1, int(stack))
+        self.downsample = max(1, int(downsample))
+        self.rgb = rgb
+        slots = 1 if self.stack == 1 else self.stack * max(2, ring)
+        self.buffer = np.zeros((slots, height, width, 4), dtype=np.uint8)
+        self._surfaces = [
+            pygame.image.frombuffer(self.buffer[i], (width, height), "BGRA") for i in range(slots)
+        ]
+        super().__init__(self._surfaces[0])
+        self.slot = 0
+        self.frames_rendered = 0
+        self._view = None
+        self.restart()
+
+    def restart(self):
+        """Begin a new stack: the next frame is repeated into the whole history."""
+        self._target(self.stack - 1)
+        self._fill_history = True
+
+    def _target(self, slot: int):
+        self.slot = slot
+        self.surface = self._surfaces[slot]
+
+    def frames(self):
+        """View of the latest frame (or ``stack`` frames), ``(..., h, w, 3 or 4)``."""
+        return self._view
+
+    def present(self):
+        latest = self.slot
+        first = latest - self.stack + 1
+        if self._fill_history:
+            self.buffer[first:latest] = self.buffer[latest]
+            self._fill_history = False
+        frames = self.buffer[latest] if self.stack == 1 else self.buffer[first : latest + 1]
+        k = self.downsample
+        if k > 1:
+            frames = frames[..., ::k, ::k, :]
+        self._view = frames[..., 2::-1] if self.rgb else frames
+        self.frames_rendered += 1
+        if len(self._surfaces) == 1:
+            return
+        nxt = latest + 1
+        if nxt == len(self._surfaces):
+            keep = self.stack - 1
+            self.buffer[:keep] = self.buffer[nxt - keep : nxt]
+            nxt = keep
+        self._target(nxt)
+
+
+class TextureCanvas(Canvas):
+    def __init__(self, renderer, logical_size):
+        super().__init__()
+        self.renderer = renderer
+        self.width, self.height = logical_size
+        renderer.logical_size = logical_size
+        # Weak reference to the surface -> its Texture. An entry goes when its
+        # surface is freed, so a recycled id() can never hit a stale texture.
+        self._textures = OrderedDict()
+        self._sprites = {}
+
+    @classmethod
+    def open(cls, config) -> "TextureCanvas":
+        from pygame._sdl2.video import Renderer, Window
+
+        os.environ.setdefault("SDL_RENDER_BATCHING", "1")
+        os.environ["SDL_RENDER_SCALE_QUALITY"] = (
+            "nearest" if config.scale_mode == "nearest" else "linear"
+        )
+        size = (int(config.width * config.window_scale), int(config.height * config.window_scale))
+        window = Window(config.title, size=size, resizable=True)
+        try:
+            renderer = Renderer(
+                window,
+                accelerated=1 if config.render_accelerated else 0,
+                vsync=False,
+            )
+            return cls(renderer, (config.width, config.height))
+        except Exception:
+            # The caller falls back to surfaces; don't leave a stray window open.
+            window.destroy()
+            raise
+
+    def _texture(self, image: pygame.Surface):
+        from pygame._sdl2.video import Texture
+
+        key = weakref.ref(image)
+        tex = self._textures.get(key)
+        if tex is not None:
+            self._textures.move_to_end(key)
+            return tex
+        tex = Texture.from_surface(self.renderer, image)
+        self._textures[weakref.ref(image, self._forget_texture)] = tex
+        if len(self._textures) > TEXTURE_CACHE_LIMIT:
+            self._textures.popitem(last=False)
+        return tex
+
+    def _forget_texture(self, key):
+        self._textures.pop(key, None)
+
+    def _sprite(self, kind: str, size, radius: int = 0, width: int = 0):
+        """White shape textures that are tinted per draw via colour modulation."""
+        key = (kind, size, radius, width)
+        sprite = self._sprites.get(key)
+        if sprite is None:
+            surf = pygame.Surface(size, pygame.SRCALPHA)
+            if kind == "rect":
+                pygame.draw.rect(surf, (255, 255, 255), surf.get_rect(), width=width, border_radius=radius)
+            else:
+                pygame.draw.circle(surf, (255, 255, 255), (radius, radius), radius, width=width)
+            from pygame._sdl2.video import Texture
+
+            sprite = Texture.from_surface(self.renderer, surf)
+            self._sprites[key] = sprite
+        return sprite
+
+    def fill(self, color):
+        self.renderer.draw_color = _rgba(color)
+        self.renderer.clear()
+
+    def blit(self, image: pygame.Surface, dest, size=None, alpha=None):
+        tex = self._texture(image)
+        tex.alpha = 255 if alpha is None else alpha
+        tex.draw(dstrect=_topleft_rect(image.get_size(), dest, size))
+
+    def _tinted(self, sprite, color, dstrect):
+        sprite.color = color[:3]
+        sprite.alpha = color[3] if len(color) > 3 else 255
+        sprite.draw(dstrect=dstrect)
+
+    def rect(self, color, rect, radius: int = 0, width: int = 0):
+        rect = pygame.Rect(rect)
+        if radius <= 0 and width <= 1:
+            self.renderer.draw_color = _rgba(color)
+            if width:
+                self.renderer.draw_rect(rect)
+            else:
+                self.renderer.fill_rect(rect)
+            return
+        self._tinted(self._sprite("rect", rect.size, radius, width), color, rect)
+
+    def circle(self, color, center, radius: int, width: int = 0):
+        if radius <= 0:
+            return
+        size = (2 * radius, 2 * radius)
+        sprite = self._sprite("circle", size, radius, width)
+        self._tinted(sprite, color, pygame.Rect(center[0] - radius, center[1] - radius, *size))
+
+    def line(self, color, start, end):
+        self.renderer.draw_color = _rgba(color)
+        self.renderer.draw_line(start, end)
+
+    def present(self):
+        self.renderer.present()
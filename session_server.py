@@ -0,0 +1,501 @@
+"""
+session_server.py — Host thousands of headless games behind a local socket API.
+
+``SessionHost`` owns many independent :class:`Session` objects. Each session
+has its own ``Config``, difficulty, character and RNG. They all run on one
+asyncio loop, grouped by tick rate: each group is one timer task that
+updates all of its sessions, so the number of timers scales with the
+number of distinct rates, not with the number of sessions. When a
+power-up changes a session's tick rate, the session moves to the matching
+group.
+
+``SessionServer`` speaks newline-delimited JSON on a local TCP port or a
+Unix socket::
+
+    {"op": "create", "difficulty": "Vigilante", "character": "Joker", "seed": 7}
+    {"op": "input", "id": 1, "dir": "left"}
+    {"op": "state", "id": 1}
+    {"op": "restart", "id": 1}
+    {"op": "close", "id": 1}
+    {"op": "metrics"}
+
+Every reply carries ``"ok"``; an optional ``"rid"`` in a request is echoed
+back so clients can pipeline requests.
+
+Sessions start in the server process. When that process's busy fraction
+passes ``saturation``, new sessions go to worker processes, each running its
+own ``SessionHost``, up to ``max_workers``. Sessions are placed on the least
+loaded shard and stay there for their lifetime.
+"""
+
+import asyncio
+import itertools
+import json
+import multiprocessing as mp
+import os
+import time
+
+from game import Game
+from game_settings import Config
+from snake_env import ACTIONS
+
+
+DIR_NAMES = {"up": ACTIONS[0], "right": ACTIONS[1], "down": ACTIONS[2], "left": ACTIONS[3]}
+LOAD_WINDOW = 1.0  # seconds of tick work averaged into ``load``
+
+
+class SessionError(Exception):
+    pass
+
+
+def _int_field(msg: dict, key: str, required: bool = True):
+    value = msg.get(key)
+    if value is None and not required:
+        return None
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise SessionError(f"{key} must be an integer")
+    return value
+
+
+class Session:
+    __slots__ = ("id", "game", "rate", "ticks", "missed", "lag_ms", "max_lag_ms")
+
+    def __init__(self, session_id: int, difficulty=None, character=None, seed=None, config=None):
+        game = Game(config or Config(), headless=True)
+        if difficulty is not None:
+            if difficulty not in game.difficulty_names:
+                raise SessionError(f"unknown difficulty {difficulty!r}")
+            game.selected_difficulty = game.difficulty_names.index(difficulty)
+        if character is not None:
+            if character not in game.character_names:
+                raise SessionError(f"unknown character {character!r}")
+            game.selected_character = game.character_names.index(character)
+        if seed is not None:
+            game.rng.seed(seed)
+        game.start_game()
+        self.id = session_id
+        self.game = game
+        self.rate = game.get_tick_rate()
+        self.ticks = 0
+        self.missed = 0
+        self.lag_ms = 0.0
+        self.max_lag_ms = 0.0
+
+    def steer(self, direction):
+        if isinstance(direction, int) and not isinstance(direction, bool):
+            direction = ACTIONS[direction % len(ACTIONS)]
+        else:
+            direction = DIR_NAMES.get(direction) if isinstance(direction, str) else None
+            if direction is None:
+                raise SessionError("dir must be up/right/down/left or 0-3")
+        if self.game.state == "playing":
+            self.game.snake.set_direction(direction)
+
+    def status(self) -> dict:
+        game = self.game
+        return {
+            "id": self.id,
+            "state": game.state,
+            "score": game.score,
+            "length": len(game.snake.body),
+            "head": game.snake.head(),
+            "food": game.food.pos,
+            "power_up": game.power_up.definition["key"] if game.power_up else None,
+            "tick_rate": self.rate,
+            "ticks": self.ticks,
+            "missed_ticks": self.missed,
+            "lag_ms": round(self.lag_ms, 3),
+            "max_lag_ms": round(self.max_lag_ms, 3),
+        }
+
+
+class SessionHost:
+    """Tick many sessions on the running asyncio loop, one timer per tick rate."""
+
+    def __init__(self, clock=time.perf_counter):
+        self.sessions = {}
+        self.groups = {}  # tick rate -> {session id: Session}
+        self._tasks = {}
+        self._ids = itertools.count(1)
+        self._clock = clock
+        self._busy = 0.0
+        self._busy_since = clock()
+        self._load = 0.0
+
+    # -- session lifecycle ---------------------------------------------
+    def create(self, difficulty=None, character=None, seed=None, session_id=None) -> Session:
+        if session_id is None:
+            session_id = next(self._ids)
+        session = Session(session_id, difficulty, character, seed)
+        self.sessions[session_id] = session
+        self._join(session)
+        return session
+
+    def close(self, session_id: int):
+        session = self.sessions.pop(session_id, None)
+        if session is not None:
+            self.groups[session.rate].pop(session_id, None)
+
+    def get(self, session_id) -> Session:
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise SessionError(f"no session {session_id}")
+        return session
+
+    def _join(self, session: Session):
+        group = self.groups.setdefault(session.rate, {})
+        group[session.id] = session
+        task = self._tasks.get(session.rate)
+        if task is None or task.done():
+            self._tasks[session.rate] = asyncio.get_running_loop().create_task(
+                self._tick_group(session.rate)
+            )
+
+    # -- scheduling ----------------------------------------------------
+    async def _tick_group(self, rate: int):
+        loop = asyncio.get_running_loop()
+        group = self.groups[rate]
+        period = 1.0 / rate
+        due = loop.time() + period
+        while group:
+            delay = due - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            start = loop.time()
+            # Ticks that are already a full period late are skipped, not replayed.
+            missed = int((start - due) / period)
+            # Every session in the batch was due at the same time; time spent
+            # updating the ones before it is batch cost, not scheduling lag.
+            lag_ms = (start - due) * 1000.0
+            moved = []
+            for session in list(group.values()):
+                session.lag_ms = lag_ms
+                if lag_ms > session.max_lag_ms:
+                    session.max_lag_ms = lag_ms
+                session.missed += missed
+                session.ticks += 1
+                game = session.game
+                game.update()
+                if game.get_tick_rate() != rate:
+                    moved.append(session)
+            for session in moved:
+                del group[session.id]
+                session.rate = session.game.get_tick_rate()
+                self._join(session)
+            self._busy += loop.time() - start
+            self._update_load()
+            due += period * (missed + 1)
+        del self.groups[rate]
+        self._tasks.pop(rate, None)
+
+    def _update_load(self):
+        now = self._clock()
+        elapsed = now - self._busy_since
+        if elapsed >= LOAD_WINDOW:
+            self._load = min(1.0, self._busy / elapsed)
+            self._busy = 0.0
+            self._busy_since = now
+
+    @property
+    def load(self) -> float:
+        """Busy fraction of the last ``LOAD_WINDOW``; decays while no group ticks."""
+        elapsed = self._clock() - self._busy_since
+        if elapsed >= LOAD_WINDOW:
+            # No tick has closed the window since: count the idle time too.
+            return min(1.0, self._busy / elapsed)
+        return self._load
+
+    def metrics(self) -> dict:
+        lags = sorted(s.lag_ms for s in self.sessions.values())
+        n = len(lags)
+        return {
+            "sessions": n,
+            "groups": {str(rate): len(group) for rate, group in sorted(self.groups.items())},
+            "load": round(self.load, 3),
+            "lag_p50_ms": round(lags[n // 2], 3) if n else 0.0,
+            "lag_p99_ms": round(lags[min(n - 1, int(n * 0.99))], 3) if n else 0.0,
+            "max_lag_ms": round(max((s.max_lag_ms for s in self.sessions.values()), default=0.0), 3),
+            "missed_ticks": sum(s.missed for s in self.sessions.values()),
+        }
+
+    # -- request handling ----------------------------------------------
+    def handle(self, msg: dict) -> dict:
+        op = msg.get("op")
+        try:
+            if op == "create":
+                session = self.create(
+                    msg.get("difficulty"),
+                    msg.get("character"),
+                    _int_field(msg, "seed", required=False),
+                    _int_field(msg, "id", required=False),
+                )
+                return {"ok": True, "id": session.id, "tick_rate": session.rate}
+            if op == "input":
+                self.get(_int_field(msg, "id")).steer(msg.get("dir"))
+                return {"ok": True}
+            if op == "state":
+                return {"ok": True, **self.get(_int_field(msg, "id")).status()}
+            if op == "restart":
+                session = self.get(_int_field(msg, "id"))
+                self.groups[session.rate].pop(session.id, None)
+                session.game.start_game()
+                session.rate = session.game.get_tick_rate()
+                self._join(session)
+                return {"ok": True}
+            if op == "close":
+                self.close(_int_field(msg, "id"))
+                return {"ok": True}
+            if op == "metrics":
+                return {"ok": True, **self.metrics()}
+        except SessionError as exc:
+            return {"ok": False, "error": str(exc)}
+        return {"ok": False, "error": f"unknown op {op!r}"}
+
+
+def _reply(msg: dict, reply: dict) -> bytes:
+    if "rid" in msg:
+        reply["rid"] = msg["rid"]
+    return json.dumps(reply, separators=(",", ":")).encode() + b"\n"
+
+
+async def _serve_lines(reader, writer, handle):
+    """Answer JSON-line requests with ``await handle(msg)`` until EOF."""
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            try:
+                msg = json.loads(line)
+            except ValueError:
+                msg = None
+            if not isinstance(msg, dict):
+                writer.write(b'{"ok":false,"error":"bad json"}\n')
+                continue
+            try:
+                reply = await handle(msg)
+            except Exception as exc:
+                # One bad request must not take the connection (or a shard) down.
+                reply = {"ok": False, "error": f"internal error: {exc!r}"}
+            writer.write(_reply(msg, reply))
+            if writer.transport.get_write_buffer_size() > 1 << 20:
+                await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+def _shard_worker(conn):
+    """Worker process: serve one SessionHost to the front server over TCP."""
+
+    async def main():
+        host = SessionHost()
+
+        async def handle(msg):
+            reply = host.handle(msg)
+            reply["load"] = host.load
+            return reply
+
+        done = asyncio.Event()
+
+        async def client(reader, writer):
+            try:
+                await _serve_lines(reader, writer, handle)
+            finally:
+                done.set()
+
+        server = await asyncio.start_server(client, "127.0.0.1", 0)
+        conn.send(server.sockets[0].getsockname()[1])
+        conn.close()
+        async with server:
+            await done.wait()
+
+    asyncio.run(main())
+
+
+class _RemoteShard:
+    def __init__(self, proc, reader, writer):
+        self.proc = proc
+        self.reader = reader
+        self.writer = writer
+        self.load = 0.0
+        self.sessions = 0
+        self._pending = {}
+        self._rids = itertools.count()
+        self._reader_task = asyncio.get_running_loop().create_task(self._read_replies())
+
+    @classmethod
+    async def spawn(cls):
+        ctx = mp.get_context("spawn")
+        parent, child = ctx.Pipe()
+        proc = ctx.Process(target=_shard_worker, args=(child,), daemon=True)
+        proc.start()
+        child.close()
+        loop = asyncio.get_running_loop()
+        port = await loop.run_in_executor(None, parent.recv)
+        parent.close()
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        return cls(proc, reader, writer)
+
+    @property
+    def closed(self) -> bool:
+        return self._reader_task.done()
+
+    async def _read_replies(self):
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                reply = json.loads(line)
+                self.load = reply.pop("load", self.load)
+                future = self._pending.pop(reply.pop("rid", None), None)
+                if future is not None and not future.done():
+                    future.set_result(reply)
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_result({"ok": False, "error": "shard exited"})
+            self._pending.clear()
+
+    async def call(self, msg: dict) -> dict:
+        if self.closed:
+            return {"ok": False, "error": "shard exited"}
+        rid = next(self._rids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[rid] = future
+        self.writer.write(json.dumps({**msg, "rid": rid}, separators=(",", ":")).encode() + b"\n")
+        return await future
+
+    def close(self):
+        self.writer.close()
+        self.proc.join(timeout=2)
+
+
+class SessionServer:
+    """JSON-lines front end that places sessions on local or worker shards."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, path=None,
+                 max_workers=None, saturation: float = 0.75):
+        self.host_addr = host
+        self.port = port
+        self.path = path
+        self.max_workers = (os.cpu_count() or 1) if max_workers is None else max_workers
+        self.saturation = saturation
+        self.local = SessionHost()
+        self.workers = []
+        self.placement = {}  # session id -> shard (None = local)
+        self._ids = itertools.count(1)
+        self._spawning = None
+        self._server = None
+
+    async def start(self):
+        if self.path is not None:
+            self._server = await asyncio.start_unix_server(self._client, self.path)
+        else:
+            self._server = await asyncio.start_server(self._client, self.host_addr, self.port)
+            self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+        for worker in self.workers:
+            worker.close()
+
+    async def _client(self, reader, writer):
+        await _serve_lines(reader, writer, self.handle)
+
+    def _drop_dead_shards(self):
+        """Forget workers whose connection is gone, and the sessions they held."""
+        dead = [worker for worker in self.workers if worker.closed]
+        if not dead:
+            return
+        self.workers = [worker for worker in self.workers if not worker.closed]
+        self.placement = {
+            sid: shard for sid, shard in self.placement.items() if shard not in dead
+        }
+        for worker in dead:
+            worker.close()
+
+    async def _pick_shard(self):
+        """Least loaded shard, spawning a worker when every shard is saturated."""
+        best, best_key = None, (self.local.load, len(self.local.sessions))
+        for worker in self.workers:
+            key = (worker.load, worker.sessions)
+            if key < best_key:
+                best, best_key = worker, key
+        if best_key[0] >= self.saturation and len(self.workers) < self.max_workers:
+            if self._spawning is None:
+                self._spawning = asyncio.get_running_loop().create_task(_RemoteShard.spawn())
+                self._spawning.add_done_callback(self._spawned)
+            try:
+                return await asyncio.shield(self._spawning)
+            except Exception:
+                pass  # worker failed to start: keep serving from existing shards
+        return best
+
+    def _spawned(self, task):
+        self._spawning = None
+        if not task.cancelled() and task.exception() is None:
+            self.workers.append(task.result())
+
+    async def handle(self, msg: dict) -> dict:
+        op = msg.get("op")
+        self._drop_dead_shards()
+        if op == "create":
+            session_id = next(self._ids)
+            shard = await self._pick_shard()
+            msg = {**msg, "id": session_id}
+            reply = self.local.handle(msg) if shard is None else await shard.call(msg)
+            if reply.get("ok"):
+                self.placement[session_id] = shard
+                if shard is not None:
+                    shard.sessions += 1
+            return reply
+        if op == "metrics":
+            shards = [{"shard": "local", **self.local.metrics()}]
+            for i, worker in enumerate(self.workers):
+                reply = await worker.call({"op": "metrics"})
+                reply.pop("ok", None)
+                shards.append({"shard": f"worker-{i}", **reply, "load": worker.load})
+            return {"ok": True, "sessions": len(self.placement), "shards": shards}
+        session_id = msg.get("id")
+        if not isinstance(session_id, int) or session_id not in self.placement:
+            return {"ok": False, "error": f"no session {session_id}"}
+        shard = self.placement[session_id]
+        if op == "close":
+            del self.placement[session_id]
+            if shard is not None:
+                shard.sessions -= 1
+        return self.local.handle(msg) if shard is None else await shard.call(msg)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Host headless Batman Snake sessions.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on a Unix socket path instead of TCP")
+    parser.add_argument("--workers", type=int, default=None, help="max worker processes")
+    args = parser.parse_args(argv)
+    server = SessionServer(args.host, args.port, args.unix, args.workers)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
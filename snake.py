@@ -4,18 +4,34 @@ import math
 
 import pygame
 
+from quality import QUALITY_LOW, QUALITY_MINIMAL
+from render import load_image
+
 
 Vec2 = Tuple[int, int]
+DIRECTIONS: Tuple[Vec2, ...] = ((1, 0), (0, 1), (-1, 0), (0, -1))
 
 
 class Snake:
-    def __init__(self, config, start: Vec2, character: Optional[dict] = None):
+    def __init__(self, config, start: Vec2, character: Optional[dict] = None, level=None):
         self.config = config
         self.character = character or {}
-        self.body: Deque[Vec2] = deque(
-            (start[0] - i, start[1]) for i in range(config.start_length)
-        )
+        self.level = level
         self.dir: Vec2 = (1, 0)  # moving right
+        if level is None:
+            self.body: Deque[Vec2] = deque(
+                (start[0] - i, start[1]) for i in range(config.start_length)
+            )
+        else:
+            # Start coiled on one cell so the body never begins inside a wall,
+            # facing the first open neighbour.
+            self.body = deque([start] * config.start_length)
+            for d in DIRECTIONS:
+                nxt = level.advance(start, d)
+                if nxt is not None and not level.blocked(nxt):
+                    self.dir = d
+                    break
+        self.crashed = False
         self.grow_pending = 0
         self.head_img = None
         self.head_frames: dict[Vec2, list[pygame.Surface]] = {}
@@ -28,7 +44,7 @@ class Snake:
         head_name = self.character.get("head") or self.config.img_snake_head
         try:
             path = f"{self.config.assets_dir}/{head_name}"
-            img = pygame.image.load(path).convert_alpha()
+            img = load_image(path)
         except Exception:
             img = None
         if img is None:
@@ -100,19 +116,32 @@ class Snake:
     def head(self) -> Vec2:
         return self.body[0]
 
-    def move(self):
-        hx, hy = self.head()
-        dx, dy = self.dir
-        new_head = ((hx + dx) % self.config.cols, (hy + dy) % self.config.rows)
+    def move(self) -> Optional[Vec2]:
+        """Advance one cell; returns the cell the tail vacated, if any."""
+        if self.level is None:
+            hx, hy = self.head()
+            dx, dy = self.dir
+            new_head = ((hx + dx) % self.config.cols, (hy + dy) % self.config.rows)
+        else:
+            new_head = self.level.advance(self.head(), self.dir)
+            if new_head is None:
+                # Ran off a no-wrap edge
+                self.crashed = True
+                return None
+            if self.level.blocked(new_head):
+                self.crashed = True
         self.body.appendleft(new_head)
         if self.grow_pending > 0:
             self.grow_pending -= 1
-        else:
-            self.body.pop()
+            return None
+        return self.body.pop()
 
     def grow(self, n: int = 1):
         self.grow_pending += n
 
+    def collides(self) -> bool:
+        return self.crashed or self.collides_self()
+
     def collides_self(self) -> bool:
         h = self.head()
         return h in list(self.body)[1:]
@@ -126,7 +155,7 @@ class Snake:
         wobble = 0.6 + 0.4 * math.sin((tick_ms / 220.0) + index * 0.55)
         return tuple(min(255, max(0, int(c * wobble))) for c in base)
 
-    def draw(self, surf: pygame.Surface, tick_ms: Optional[int] = None):
+    def draw(self, canvas, tick_ms: Optional[int] = None, quality: int = 0, camera=(0, 0)):
         if tick_ms is None:
             tick_ms = pygame.time.get_ticks()
         cs = self.config.cell_size
@@ -137,22 +166,31 @@ class Snake:
         else:
             head_surface = None
 
+        palette = self.body_palette
+        flat = quality >= QUALITY_MINIMAL
+        pulses = quality < QUALITY_LOW
+        in_view = self.config.in_view
+        grid_to_px = self.config.grid_to_px
         for i, (x, y) in enumerate(self.body):
-            px, py = self.config.grid_to_px((x, y))
+            if not in_view((x, y), camera):
+                continue
+            px, py = grid_to_px((x, y), camera)
             rect = pygame.Rect(px, py, cs, cs)
             if i == 0 and head_surface is not None:
-                surf.blit(head_surface, rect)
+                canvas.blit(head_surface, rect)
+            elif flat:
+                canvas.rect(palette[i % len(palette)], rect)
             else:
                 color = self._segment_color(i, tick_ms)
-                pygame.draw.rect(surf, color, rect, border_radius=6)
-                if i > 0:
+                canvas.rect(color, rect, radius=6)
+                if i > 0 and pulses:
                     pulse = 0.3 + 0.7 * math.sin((tick_ms / 260.0) + i * 0.4)
                     radius = max(2, int((cs // 2) * 0.35 * pulse))
                     center = (rect.centerx, rect.centery)
-                    pygame.draw.circle(surf, self.trail_color, center, radius)
+                    canvas.circle(self.trail_color, center, radius)
 
-        if not frames and self.head_img is not None:
+        if not frames and self.head_img is not None and in_view(self.head(), camera):
             # fallback static head
-            px, py = self.config.grid_to_px(self.head())
+            px, py = grid_to_px(self.head(), camera)
             rect = pygame.Rect(px, py, cs, cs)
-            surf.blit(self.head_img, rect)
+            canvas.blit(self.head_img, rect)
@@ -0,0 +1,299 @@
+"""
+snake_env.py — Gymnasium-style environment over the headless game rules.
+
+``SnakeEnv`` follows the Gymnasium ``reset``/``step`` API and encodes the
+board as a ``uint8`` tensor of shape ``(channels, rows, cols)``. On level
+boards a ``walls`` channel is appended (255 = wall, 128 = portal).
+``PixelSnakeEnv`` observes rendered frames instead; they are drawn
+offscreen into NumPy-backed surfaces. ``reset``/``step`` return a fresh
+array each call; ``copy_obs=False`` returns the env's own buffer instead,
+which the next call overwrites.
+``VectorEnv`` runs several environments in subprocesses; with
+``shared_memory=True`` the workers write observations straight into one
+shared buffer so the learner reads them without copying or unpickling.
+"""
+
+import copy
+import multiprocessing as mp
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from game import Game
+from game_settings import Config
+from game_state import POWERUP_KEYS
+from level import PORTAL, WALL
+from power_up import POWERUP_DEFS
+
+try:
+    import gymnasium as gym
+    from gymnasium import spaces
+except ImportError:  # gymnasium is optional; the API shape is the same
+    gym = None
+    spaces = None
+
+
+CHANNELS = ("body", "head", "food", "powerup", "powerup_timer", "speed_timer")
+LEVEL_CHANNELS = CHANNELS + ("walls",)
+ACTIONS = ((0, -1), (1, 0), (0, 1), (-1, 0))  # up, right, down, left
+DEATH_REWARD = -1.0
+_SPEED_TIME = max(d.get("speed_time", 4) for d in POWERUP_DEFS)
+
+_EnvBase = gym.Env if gym is not None else object
+
+
+class SnakeEnv(_EnvBase):
+    metadata = {"render_modes": []}
+
+    def __init__(self, config=None, difficulty=None, character=None, max_steps: int = 10_000,
+                 copy_obs: bool = True):
+        self.cfg = config or Config()
+        self.copy_obs = copy_obs
+        self.game = Game(self.cfg, headless=True)
+        if difficulty is not None:
+            self.game.selected_difficulty = self.game.difficulty_names.index(difficulty)
+        if character is not None:
+            self.game.selected_character = self.game.character_names.index(character)
+        self.max_steps = int(max_steps)
+        self.steps = 0
+        self._walls = None
+        self.channels = CHANNELS
+        level = self.game.level
+        if level is not None:
+            cells = np.frombuffer(level.cells, dtype=np.uint8)
+            self._walls = np.where(cells == WALL, 255, np.where(cells == PORTAL, 128, 0)).astype(np.uint8)
+            self.channels = LEVEL_CHANNELS
+        self.obs_shape = (len(self.channels), self.cfg.rows, self.cfg.cols)
+        self._obs = np.zeros(self.obs_shape, dtype=np.uint8)
+        if spaces is not None:
+            self.observation_space = spaces.Box(0, 255, self.obs_shape, dtype=np.uint8)
+            self.action_space = spaces.Discrete(len(ACTIONS))
+
+    def reset(self, seed=None, options=None):
+        if seed is not None:
+            self.game.rng.seed(seed)
+        self.game.start_game()
+        self.steps = 0
+        return self._observation(), self._info()
+
+    def step(self, action):
+        game = self.game
+        game.snake.set_direction(ACTIONS[int(action)])
+        before = game.score
+        game.update()
+        self.steps += 1
+        terminated = game.state == "game_over"
+        truncated = not terminated and self.steps >= self.max_steps
+        reward = float(game.score - before)
+        if terminated:
+            reward += DEATH_REWARD
+        return self._observation(), reward, terminated, truncated, self._info()
+
+    def observe(self, out=None) -> np.ndarray:
+        """Encode the board into ``out`` (or an internal buffer) and return it."""
+        obs = self._obs if out is None else out
+        obs.fill(0)
+        game = self.game
+        cfg = self.cfg
+        planes = obs.reshape(len(self.channels), -1)
+        cols = cfg.cols
+
+        body = game.snake.body
+        cells = np.fromiter((y * cols + x for x, y in body), dtype=np.intp, count=len(body))
+        planes[0, cells[1:]] = 255
+        planes[1, cells[0]] = 255
+        if game.food.pos is not None:
+            fx, fy = game.food.pos
+            planes[2, fy * cols + fx] = 255
+
+        power_up = game.power_up
+        if power_up is not None:
+            px, py = power_up.pos
+            cell = py * cols + px
+            kind = POWERUP_KEYS.index(power_up.definition["key"]) + 1
+            planes[3, cell] = kind * (255 // len(POWERUP_KEYS))
+            lifetime = max(1, cfg.powerup_lifetime * game.base_fps)
+            planes[4, cell] = min(255, 255 * power_up.remaining_frames // lifetime)
+        if game.speed_effect_timer > 0:
+            longest = max(1, _SPEED_TIME * game.base_fps)
+            planes[5] = min(255, 255 * game.speed_effect_timer // longest)
+        if self._walls is not None:
+            planes[6] = self._walls
+        return obs
+
+    def _observation(self) -> np.ndarray:
+        obs = self.observe()
+        return obs.copy() if self.copy_obs else obs
+
+    def _info(self) -> dict:
+        return {"score": self.game.score, "length": len(self.game.snake.body)}
+
+
+class PixelSnakeEnv(SnakeEnv):
+    """``SnakeEnv`` observing rendered frames instead of the symbolic grid.
+
+    The game draws into an :class:`render.OffscreenCanvas`, so no window is
+    opened. Observations are ``uint8`` RGB arrays of shape ``(h, w, 3)``, or
+    ``(stack, h, w, 3)`` when stacking. With ``copy_obs=False`` they are
+    views of the canvas, valid only until the next ``step``/``reset``;
+    ``observe(out)`` copies the latest frames into a caller's buffer.
+    """
+
+    def __init__(self, config=None, difficulty=None, character=None, max_steps: int = 10_000,
+                 stack: int = 1, downsample: int = 1, copy_obs: bool = True):
+        # Work on a copy: the overrides below must not leak into the caller's Config.
+        cfg = copy.copy(config) if config is not None else Config()
+        cfg.render_backend = "offscreen"
+        cfg.pixel_stack = stack
+        cfg.pixel_downsample = downsample
+        cfg.quality_adaptive = False
+        super().__init__(cfg, difficulty, character, max_steps, copy_obs)
+        self.game.init_pygame()
+        k = self.game.canvas.downsample
+        frame = (len(range(0, cfg.height, k)), len(range(0, cfg.width, k)), 3)
+        self.obs_shape = frame if self.game.canvas.stack == 1 else (self.game.canvas.stack, *frame)
+        if spaces is not None:
+            self.observation_space = spaces.Box(0, 255, self.obs_shape, dtype=np.uint8)
+
+    def reset(self, seed=None, options=None):
+        self.game.canvas.restart()
+        return super().reset(seed, options)
+
+    def _observation(self) -> np.ndarray:
+        self.game.draw()
+        frames = self.game.canvas.frames()
+        return frames.copy() if self.copy_obs else frames
+
+    def observe(self, out=None) -> np.ndarray:
+        """Return the latest observation (or copy it into ``out``); never draws."""
+        frames = self.game.canvas.frames()
+        if out is None:
+            return frames
+        np.copyto(out, frames)
+        return out
+
+
+def _worker(conn, env_kwargs, shm_name, index):
+    env = SnakeEnv(**env_kwargs)
+    env.copy_obs = False  # observations go straight to the pipe or the shared slot
+    shm = None
+    if shm_name is not None:
+        # Point the env's observation buffer at this worker's shared slot so
+        # every observe() lands directly where the learner reads it.
+        shm = SharedMemory(name=shm_name)
+        env._obs = np.ndarray(
+            env.obs_shape, dtype=np.uint8, buffer=shm.buf, offset=index * env._obs.nbytes
+        )
+    try:
+        while True:
+            cmd, arg = conn.recv()
+            if cmd == "step":
+                obs, reward, terminated, truncated, info = env.step(arg)
+                if terminated or truncated:
+                    # reset() overwrites the observation buffer, so hand the
+                    # terminal frame back for bootstrapping truncated episodes.
+                    info = {
+                        "final_score": info["score"],
+                        "final_length": info["length"],
+                        "final_observation": obs.copy(),
+                    }
+                    obs, _ = env.reset()
+                if shm is not None:
+                    conn.send((reward, terminated, truncated, info))
+                else:
+                    conn.send((obs, reward, terminated, truncated, info))
+            elif cmd == "reset":
+                obs, info = env.reset(seed=arg)
+                conn.send(info if shm is not None else (obs, info))
+            elif cmd == "close":
+                break
+    finally:
+        # Drop every view of the shared buffer first: SharedMemory.close()
+        # fails while exported views are still alive.
+        obs = None
+        env._obs = None
+        if shm is not None:
+            shm.close()
+        conn.close()
+
+
+class VectorEnv:
+    """Run ``num_envs`` :class:`SnakeEnv` instances in worker processes.
+
+    Finished environments reset automatically inside ``step``; their final
+    score, length and observation are reported in that step's info dict.
+    """
+
+    def __init__(self, num_envs: int, shared_memory: bool = True, **env_kwargs):
+        self.num_envs = int(num_envs)
+        self.shared_memory = shared_memory
+        probe = SnakeEnv(**env_kwargs)
+        self.single_observation_shape = probe.obs_shape
+        self._shm = None
+        self.observations = None
+        if shared_memory:
+            nbytes = self.num_envs * probe._obs.nbytes
+            self._shm = SharedMemory(create=True, size=nbytes)
+            self.observations = np.ndarray(
+                (self.num_envs, *probe.obs_shape), dtype=np.uint8, buffer=self._shm.buf
+            )
+        ctx = mp.get_context("spawn")
+        self._conns = []
+        self._procs = []
+        shm_name = self._shm.name if self._shm is not None else None
+        for i in range(self.num_envs):
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(
+                target=_worker, args=(child, env_kwargs, shm_name, i), daemon=True
+            )
+            proc.start()
+            child.close()
+            self._conns.append(parent)
+            self._procs.append(proc)
+        self.closed = False
+
+    def reset(self, seed=None):
+        for i, conn in enumerate(self._conns):
+            conn.send(("reset", None if seed is None else seed + i))
+        results = [conn.recv() for conn in self._conns]
+        if self.shared_memory:
+            return self.observations, results
+        return np.stack([obs for obs, _ in results]), [info for _, info in results]
+
+    def step(self, actions):
+        for conn, action in zip(self._conns, actions):
+            conn.send(("step", int(action)))
+        results = [conn.recv() for conn in self._conns]
+        if self.shared_memory:
+            obs = self.observations
+        else:
+            obs = np.stack([r[0] for r in results])
+            results = [r[1:] for r in results]
+        rewards = np.array([r[0] for r in results], dtype=np.float32)
+        terminated = np.array([r[1] for r in results], dtype=bool)
+        truncated = np.array([r[2] for r in results], dtype=bool)
+        infos = [r[3] for r in results]
+        return obs, rewards, terminated, truncated, infos
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        for conn in self._conns:
+            try:
+                conn.send(("close", None))
+            except (BrokenPipeError, OSError):
+                pass
+        for proc in self._procs:
+            proc.join(timeout=2)
+        self.observations = None
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,378 @@
+"""
+spectator.py — Broadcast a live game to many local viewers.
+
+``TickPublisher`` turns each game tick into a compact delta (head added,
+tail cells removed, food/power-up changes, score). It emits a keyframe (a
+``GameState`` blob) at the start of a run and every few ticks.
+``BroadcastHub`` runs an asyncio server on a background thread and fans
+frames out to raw-TCP and WebSocket viewers on the same port:
+
+* Publishing from the game thread is one ``call_soon_threadsafe``; the
+  game never waits on viewers.
+* Frames are written straight to each viewer's transport. A viewer whose
+  write buffer is over the high-water mark is marked lagging and skipped.
+  Once its buffer drains, it gets the latest keyframe plus the deltas since
+  that keyframe, so intermediate frames are dropped rather than queued.
+* Late joiners get the same catch-up on connect.
+* WebSocket pings are answered with a pong and a close frame is echoed
+  before the connection ends; other client frames are ignored.
+
+Wire format: raw TCP viewers send ``b"SPEC"`` and then receive frames
+prefixed with a little-endian ``u32`` length. WebSocket viewers receive
+one binary message per frame. A frame is ``b"K" + u32 tick + GameState``
+or ``b"D"`` + :data:`DELTA`.
+"""
+
+from base64 import b64encode
+from collections import deque
+from hashlib import sha1
+import asyncio
+import struct
+import threading
+
+from game_state import NO_CELL, POWERUP_KEYS, STATES, GameState
+
+
+EV_MOVED = 1
+EV_ATE = 2
+EV_POWERUP_SPAWNED = 4
+EV_POWERUP_TAKEN = 8
+EV_POWERUP_EXPIRED = 16
+EV_DEATH = 32
+
+# type, tick, events, state, head cell, tail cells removed, food cell
+# (NO_CELL = off the board), power-up key index (-1 = none), power-up cell,
+# score
+DELTA = struct.Struct("<cIBBIHIbIi")
+KEYFRAME = struct.Struct("<cI")
+_LEN = struct.Struct("<I")
+
+TCP_HELLO = b"SPEC"
+_WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+class TickPublisher:
+    """Diff consecutive game ticks into keyframes and deltas for ``sink``.
+
+    ``sink(payload, keyframe)`` receives each encoded frame.
+    """
+
+    def __init__(self, sink, keyframe_ticks: int = 60):
+        self.sink = sink
+        self.keyframe_ticks = max(1, int(keyframe_ticks))
+        self.tick = 0
+        self._last = None
+        self._last_keyframe = 0
+
+    def _summary(self, game):
+        cols = game.cfg.cols
+        hx, hy = game.snake.head()
+        food = game.food.pos
+        power_key = -1
+        power_cell = 0
+        if game.power_up is not None:
+            px, py = game.power_up.pos
+            power_key = POWERUP_KEYS.index(game.power_up.definition["key"])
+            power_cell = py * cols + px
+        return (
+            hy * cols + hx,
+            len(game.snake.body),
+            NO_CELL if food is None else food[1] * cols + food[0],
+            power_key,
+            power_cell,
+            game.score,
+            STATES.index(game.state),
+        )
+
+    def keyframe(self, game):
+        self.tick += 1
+        self._last = self._summary(game)
+        self._last_keyframe = self.tick
+        payload = KEYFRAME.pack(b"K", self.tick) + GameState.capture(game).to_bytes()
+        self.sink(payload, True)
+
+    def on_tick(self, game):
+        if game.state == "menu" or game.snake is None:
+            self._last = None
+            return
+        last = self._last
+        playing = STATES.index("playing")
+        if (
+            last is None
+            or (last[6] != playing and game.state == "playing")
+            or self.tick - self._last_keyframe >= self.keyframe_ticks
+        ):
+            self.keyframe(game)
+            return
+        now = self._summary(game)
+        if now == last:
+            return
+        head, length, food, power_key, power_cell, score, state = now
+        events = 0
+        moved = head != last[0]
+        if moved:
+            events |= EV_MOVED
+        removed = last[1] + (1 if moved else 0) - length
+        if removed < 0:
+            # More growth than one tick allows: resync instead of guessing.
+            self.keyframe(game)
+            return
+        if food != last[2] and last[2] != NO_CELL:
+            events |= EV_ATE
+        if last[3] >= 0 and (power_key, power_cell) != last[3:5]:
+            events |= EV_POWERUP_TAKEN if head == last[4] else EV_POWERUP_EXPIRED
+        if power_key >= 0 and (power_key, power_cell) != last[3:5]:
+            events |= EV_POWERUP_SPAWNED
+        if state != last[6] and game.state == "game_over":
+            events |= EV_DEATH
+        self.tick += 1
+        self._last = now
+        self.sink(
+            DELTA.pack(
+                b"D", self.tick, events, state, head, removed, food, power_key, power_cell, score
+            ),
+            False,
+        )
+
+
+class Replica:
+    """Viewer-side board rebuilt from keyframes and deltas."""
+
+    def __init__(self):
+        self.state = None
+        self.body = deque()
+        self.tick = 0
+        self.events = 0
+
+    def apply(self, payload):
+        kind = payload[:1]
+        if kind == b"K":
+            _, self.tick = KEYFRAME.unpack_from(payload)
+            self.state = GameState.from_bytes(memoryview(payload)[KEYFRAME.size :])
+            self.body = deque(self.state.body)
+            self.events = 0
+            return True
+        if kind != b"D" or self.state is None:
+            return False
+        (_, tick, events, state, head, removed, food, power_key, power_cell, score) = DELTA.unpack(
+            payload
+        )
+        if tick <= self.tick:
+            return False
+        st = self.state
+        if events & EV_MOVED:
+            self.body.appendleft(head)
+        for _ in range(min(removed, len(self.body))):
+            self.body.pop()
+        self.tick = tick
+        self.events = events
+        st.state = state
+        st.food = food
+        st.power_key = power_key
+        st.power_pos = power_cell
+        st.score = score
+        return True
+
+
+def _ws_frame(payload: bytes, first: int = 0x82) -> bytes:
+    n = len(payload)
+    if n < 126:
+        header = bytes((first, n))
+    elif n < 1 << 16:
+        header = bytes((first, 126)) + struct.pack(">H", n)
+    else:
+        header = bytes((first, 127)) + struct.pack(">Q", n)
+    return header + payload
+
+
+def _ws_parse(buf: bytes):
+    """Decode one client frame as ``(opcode, payload, size)``; None if incomplete."""
+    if len(buf) < 2:
+        return None
+    n = buf[1] & 0x7F
+    offset = 2
+    if n == 126:
+        if len(buf) < 4:
+            return None
+        (n,) = struct.unpack_from(">H", buf, 2)
+        offset = 4
+    elif n == 127:
+        if len(buf) < 10:
+            return None
+        (n,) = struct.unpack_from(">Q", buf, 2)
+        offset = 10
+    mask = None
+    if buf[1] & 0x80:
+        mask = buf[offset : offset + 4]
+        offset += 4
+    end = offset + n
+    if len(buf) < end:
+        return None
+    payload = buf[offset:end]
+    if mask:
+        payload = bytes(b ^ mask[i & 3] for i, b in enumerate(payload))
+    return buf[0] & 0x0F, payload, end
+
+
+class _Viewer(asyncio.Protocol):
+    def __init__(self, hub):
+        self.hub = hub
+        self.transport = None
+        self.mode = None  # "tcp" or "ws" once the handshake is done
+        self.lagging = False
+        self._buf = b""
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data):
+        if self.mode == "tcp":
+            return  # raw viewers only listen
+        if self.mode == "ws":
+            self._buf += data
+            self._ws_control()
+            return
+        self._buf += data
+        if self._buf.startswith(TCP_HELLO):
+            self.mode = "tcp"
+        elif self._buf.startswith(b"GET ") and b"\r\n\r\n" in self._buf:
+            key = None
+            for line in self._buf.split(b"\r\n"):
+                name, _, value = line.partition(b":")
+                if name.strip().lower() == b"sec-websocket-key":
+                    key = value.strip()
+            if key is None:
+                self.transport.close()
+                return
+            accept = b64encode(sha1(key + _WS_GUID).digest())
+            self.transport.write(
+                b"HTTP/1.1 101 Switching Protocols\r\n"
+                b"Upgrade: websocket\r\nConnection: Upgrade\r\n"
+                b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n"
+            )
+            self.mode = "ws"
+        elif len(self._buf) > 8192 or not (b"GET ".startswith(self._buf[:4]) or TCP_HELLO.startswith(self._buf[:4])):
+            self.transport.close()
+            return
+        if self.mode is not None:
+            self._buf = b""
+            self.hub._join(self)
+
+    def _ws_control(self):
+        # WebSocket viewers only send control frames: answer pings with a
+        # pong carrying the same payload and echo a close before hanging up.
+        while True:
+            frame = _ws_parse(self._buf)
+            if frame is None:
+                if len(self._buf) > 8192:
+                    self.transport.close()
+                return
+            opcode, payload, size = frame
+            self._buf = self._buf[size:]
+            if opcode == 0x8:
+                self.transport.write(_ws_frame(payload[:2], 0x88))
+                self.transport.close()
+                return
+            if opcode == 0x9:
+                self.transport.write(_ws_frame(payload, 0x8A))
+
+    def connection_lost(self, exc):
+        self.hub._leave(self)
+
+
+class BroadcastHub:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, high_water: int = 64 * 1024):
+        self.host = host
+        self.port = port
+        self.high_water = high_water
+        self.viewers = set()
+        self.keyframe = None  # (tcp frame, ws frame) of the latest keyframe
+        self.backlog = []  # frames since the latest keyframe
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._error = None
+
+    # -- game thread ---------------------------------------------------
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="spectator-hub", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+        return self
+
+    def publish(self, payload: bytes, keyframe: bool = False):
+        loop = self._loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self._fanout, payload, keyframe)
+
+    def stop(self):
+        loop = self._loop
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join(timeout=2)
+        self._loop = None
+
+    # -- hub thread ----------------------------------------------------
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            self._server = loop.run_until_complete(
+                loop.create_server(lambda: _Viewer(self), self.host, self.port, backlog=1024)
+            )
+        except OSError as exc:
+            self._error = exc
+            loop.close()
+            self._ready.set()
+            return
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._loop = loop
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            self._server.close()
+            for viewer in list(self.viewers):
+                viewer.transport.close()
+            loop.run_until_complete(asyncio.sleep(0))
+            loop.close()
+
+    def _join(self, viewer):
+        self.viewers.add(viewer)
+        self._catch_up(viewer)
+
+    def _leave(self, viewer):
+        self.viewers.discard(viewer)
+
+    def _catch_up(self, viewer):
+        if self.keyframe is None:
+            return
+        index = 0 if viewer.mode == "tcp" else 1
+        frames = [self.keyframe[index]] + [frame[index] for frame in self.backlog]
+        viewer.transport.write(b"".join(frames))
+        viewer.lagging = False
+
+    def _fanout(self, payload: bytes, keyframe: bool):
+        frame = (_LEN.pack(len(payload)) + payload, _ws_frame(payload))
+        if keyframe:
+            self.keyframe = frame
+            self.backlog = []
+        else:
+            self.backlog.append(frame)
+        high_water = self.high_water
+        for viewer in self.viewers:
+            transport = viewer.transport
+            if transport.get_write_buffer_size() > high_water:
+                viewer.lagging = True
+                self.frames_dropped += 1
+            elif viewer.lagging:
+                self._catch_up(viewer)
+            else:
+                transport.write(frame[0] if viewer.mode == "tcp" else frame[1])
+                self.frames_sent += 1
@@ -0,0 +1,58 @@
+import struct
+
+from analytics import aggregate
+from game import Game
+from game_settings import Config
+from recording import HEADER, SessionRecorder, read_header
+
+
+def _record(directory, runs):
+    recorder = SessionRecorder(directory)
+    game = Game(Config(), headless=True)
+    game.rng.seed(0)
+    for _ in range(runs):
+        game.start_game()
+        for _ in range(50):
+            game.update()
+            recorder.on_tick(game)
+        game.state = "menu"  # back to the menu ends the run
+        recorder.on_tick(game)
+    return recorder
+
+
+def test_aggregate_skips_truncated_and_corrupt_files(tmp_path):
+    recorder = _record(tmp_path, 2)
+    assert recorder.runs == 2
+    good = (tmp_path / recorder.path.split("/")[-1]).read_bytes()
+
+    (tmp_path / "empty.bsr").write_bytes(b"")
+    (tmp_path / "short.bsr").write_bytes(good[: HEADER.size - 1])
+    (tmp_path / "magic.bsr").write_bytes(b"XXXX" + good[4:])
+    # Header claims a keyframe far longer than the file.
+    key_at = struct.calcsize("<4sBBHHHH")
+    (tmp_path / "keyframe.bsr").write_bytes(
+        good[:key_at] + struct.pack("<I", 1 << 30) + good[key_at + 4 :]
+    )
+
+    agg = aggregate(tmp_path, workers=0)
+    assert agg.sessions == 2
+    assert agg.skipped == 4
+
+
+def test_long_non_ascii_names_are_cut_on_a_character_boundary(tmp_path):
+    recorder = SessionRecorder(tmp_path)
+    game = Game(Config(), headless=True)
+    game.start_game()
+    name = "Тёмный рыцарь Готэма 🦇"  # 2-byte letters then a 4-byte emoji
+    game.current_character_name = name
+    game.current_difficulty = "🦇" * 7  # 28 bytes: the 7th emoji does not fit
+    recorder.on_tick(game)
+    game.update()
+    recorder.on_tick(game)
+    recorder.finish()
+
+    header = read_header((tmp_path / recorder.path.split("/")[-1]).read_bytes())
+    assert header["character"] == "Тёмный рыцар"
+    assert name.startswith(header["character"])
+    assert header["difficulty"] == "🦇" * 6
+    assert aggregate(tmp_path, workers=0).sessions == 1
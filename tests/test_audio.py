@@ -0,0 +1,97 @@
+import pygame
+import pytest
+
+from audio import SoundBank
+from game_settings import Config
+
+
+class _Channel:
+    def __init__(self):
+        self.busy = False
+        self.played = []
+
+    def get_busy(self):
+        return self.busy
+
+    def play(self, sound):
+        self.busy = True
+        self.played.append(sound)
+
+
+def _bank(voices=3, cooldown_ms=40):
+    cfg = Config()
+    cfg.sfx_cooldown_ms = cooldown_ms
+    bank = SoundBank(cfg, channels=voices)
+    bank.channels = [_Channel() for _ in range(voices)]
+    bank._started = [0] * voices
+    bank.sounds = {name: name for name in ("eat", "death", "batboost", "jokertrap")}
+    bank.enabled = True
+    return bank
+
+
+def test_disabled_without_a_mixer():
+    pygame.mixer.quit()
+    bank = SoundBank(Config())
+    assert not bank.load()
+    assert not bank.enabled
+    assert bank.play("eat") is False
+
+
+def test_disabled_when_mixer_setup_fails(monkeypatch):
+    def broken(*args):
+        raise pygame.error("no audio device")
+
+    monkeypatch.setattr(pygame.mixer, "get_init", lambda: (44100, -16, 2))
+    monkeypatch.setattr(pygame.mixer, "get_num_channels", broken)
+    bank = SoundBank(Config())
+    assert not bank.load()
+    assert bank.play("death") is False
+
+
+def test_loads_under_the_dummy_driver(tmp_path):
+    cfg = Config()
+    cfg.assets_dir = str(tmp_path)  # no files: every effect is a synth tone
+    try:
+        pygame.mixer.init(44100, -16, 2, 512)
+    except pygame.error:
+        pytest.skip("no dummy audio driver")
+    try:
+        bank = SoundBank(cfg)
+        assert bank.load()
+        assert set(bank.sounds) == set(cfg.sfx_files)
+        assert len(bank.channels) == cfg.sfx_channels
+        assert bank.play("eat", now=0.0)
+        assert not bank.play("missing", now=1.0)
+    finally:
+        pygame.mixer.quit()
+
+
+def test_cooldown_is_per_sound():
+    bank = _bank(voices=8, cooldown_ms=40)
+    assert bank.play("eat", now=1.000)
+    assert not bank.play("eat", now=1.039)
+    assert bank.play("death", now=1.039)
+    assert bank.play("eat", now=1.040)
+    # A skipped trigger does not push the window back.
+    assert not bank.play("eat", now=1.070)
+    assert bank.play("eat", now=1.080)
+    played = [s for channel in bank.channels for s in channel.played]
+    assert sorted(played) == ["death", "eat", "eat", "eat"]
+
+
+def test_free_voices_first_then_steal_the_oldest():
+    bank = _bank(voices=3, cooldown_ms=0)
+    names = ["eat", "death", "batboost"]
+    for t, name in enumerate(names):
+        assert bank.play(name, now=float(t))
+    assert [c.played for c in bank.channels] == [["eat"], ["death"], ["batboost"]]
+
+    # Every voice is busy: the oldest one (channel 0) is taken over.
+    bank.play("jokertrap", now=3.0)
+    assert bank.channels[0].played == ["eat", "jokertrap"]
+    # Next oldest is channel 1, unless a voice has finished.
+    bank.channels[2].busy = False
+    bank.play("eat", now=4.0)
+    assert bank.channels[2].played == ["batboost", "eat"]
+    bank.play("death", now=5.0)
+    assert bank.channels[1].played == ["death", "death"]
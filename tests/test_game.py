@@ -0,0 +1,28 @@
+from collections import deque
+
+from game import Game
+from game_settings import Config
+from power_up import POWERUP_DEFS
+
+
+def test_food_goes_off_board_when_head_region_has_no_spawn_cell():
+    cfg = Config()
+    cfg.set_grid(4, 4)
+    game = Game(cfg, headless=True)
+    game.start_game()
+    # Serpentine cycle over the 4x4 torus: its last cell wraps round to its first.
+    path = [(x if y % 2 == 0 else 3 - x, y) for y in range(4) for x in range(4)]
+    game.snake.body = deque(path[1:])
+    game.snake.dir = (-1, 0)
+    game.food.pos = path[0]
+    game._reset_reach()
+    # The tail cell frees up as the head eats, but a power-up sits on it.
+    game.power_up = game._new_power_up()
+    game.power_up.definition = POWERUP_DEFS[0]
+    game.power_up.pos = path[-1]
+    game.power_up.remaining_frames = 100
+
+    game.update()
+    assert game.score == 1
+    assert game.food.pos is None
+    assert game.food.pos not in game.snake.body
@@ -0,0 +1,119 @@
+import random
+
+from game import Game
+from game_settings import Config
+from game_state import NO_CELL, GameState
+from power_up import POWERUP_DEFS
+
+
+def _game(cols=16, rows=16):
+    cfg = Config()
+    cfg.set_grid(cols, rows)
+    game = Game(cfg, headless=True)
+    game.rng.seed(7)
+    game.start_game()
+    return game
+
+
+def _steer(game, turn):
+    """Head for the food, taking a side step when ``turn`` says so."""
+    hx, hy = game.snake.head()
+    target = game.food.pos or (hx, hy)
+    if turn:
+        d = ((0, 1), (1, 0))[hy % 2]
+    elif target[0] != hx:
+        d = (1 if target[0] > hx else -1, 0)
+    else:
+        d = (0, 1 if target[1] > hy else -1)
+    game.snake.set_direction(d)
+
+
+def _trace(game):
+    power = game.power_up and (game.power_up.pos, game.power_up.remaining_frames)
+    return (
+        tuple(game.snake.body),
+        game.snake.dir,
+        game.food.pos,
+        power,
+        game.score,
+        game.state,
+        game.speed_effect_timer,
+    )
+
+
+def _play(game, turns):
+    out = []
+    for turn in turns:
+        _steer(game, turn)
+        game.update()
+        out.append(_trace(game))
+    return out
+
+
+def test_round_trip_keeps_body_direction_score_and_rng():
+    game = _game()
+    turns = random.Random(1).choices((0, 0, 0, 1), k=60)
+    _play(game, turns)
+    game.effect_message = "Speed ↑"
+    st = game.snapshot()
+    back = GameState.from_bytes(st.to_bytes())
+    assert list(back.body) == [y * 16 + x for x, y in game.snake.body]
+    assert back.dir == game.snake.dir
+    assert back.score == game.score
+    assert back.food == st.food
+    assert back.rng_words == st.rng_words and back.rng_gauss == st.rng_gauss
+    assert back.effect_message == "Speed ↑"
+    for name in GameState.__slots__:
+        assert getattr(back, name) == getattr(st, name), name
+    assert back.to_bytes() == st.to_bytes()
+
+
+def test_round_trip_with_food_off_board_and_power_up():
+    game = _game()
+    game.food.pos = None
+    game.power_up = game._new_power_up()
+    game.power_up.definition = POWERUP_DEFS[1]
+    game.power_up.pos = (3, 4)
+    game.power_up.remaining_frames = 42
+    game.rng.gauss(0, 1)  # leaves a cached gauss_next in the RNG state
+    st = GameState.from_bytes(game.snapshot().to_bytes())
+    assert st.food == NO_CELL
+    assert st.rng_gauss is not None
+
+    other = _game()
+    other.restore(st)
+    assert other.food.pos is None
+    assert other.power_up.definition is POWERUP_DEFS[1]
+    assert (other.power_up.pos, other.power_up.remaining_frames) == ((3, 4), 42)
+    assert other.rng.getstate() == game.rng.getstate()
+
+
+def test_restore_reproduces_the_continuation():
+    turns = random.Random(2).choices((0, 0, 0, 1), k=400)
+    game = _game()
+    _play(game, turns[:150])
+    data = game.snapshot().to_bytes()
+    expected = _play(game, turns[150:])
+    assert game.score > 0
+
+    # A fresh game, after its own unrelated play, resumes identically.
+    other = _game()
+    other.rng.seed(99)
+    _play(other, turns[:20])
+    other.restore(GameState.from_bytes(data))
+    assert _play(other, turns[150:]) == expected
+
+    # Restoring twice into the same game gives the same run again.
+    game.restore(GameState.from_bytes(data))
+    assert _play(game, turns[150:]) == expected
+
+
+def test_from_bytes_rejects_bad_data():
+    data = _game().snapshot().to_bytes()
+    for bad in (data[:10], data[:-1], b"XXXX" + data[4:]):
+        try:
+            GameState.from_bytes(bad)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("accepted bad state bytes")
@@ -0,0 +1,72 @@
+import numpy as np
+
+from game import LEVEL_TILE_CACHE, Game
+from game_settings import Config
+from level import WALL, generate_maze, write_level
+from snake_env import LEVEL_CHANNELS, PixelSnakeEnv, SnakeEnv
+
+
+def _level_config(tmp_path, cols, rows):
+    path = tmp_path / "maze.lvl"
+    write_level(path, cols, rows, generate_maze(cols, rows, seed=1))
+    cfg = Config()
+    cfg.level_file = str(path)
+    return cfg
+
+
+def test_large_level_renders_through_camera(tmp_path):
+    cfg = _level_config(tmp_path, 201, 121)
+    env = PixelSnakeEnv(cfg)
+    cfg = env.cfg
+    obs, _ = env.reset(seed=0)
+    view = cfg.view_cells * cfg.cell_size
+    assert obs.shape == (view + 48, view, 3)
+    tiles = dict(env.game.level_tiles)
+    assert 0 < len(tiles) <= LEVEL_TILE_CACHE
+    for _ in range(3):
+        env.step(1)
+    # Scrolling reuses the pre-drawn tiles instead of redrawing the level.
+    for key, tile in tiles.items():
+        assert env.game.level_tiles.get(key, tile) is tile
+    assert len(env.game.level_tiles) <= LEVEL_TILE_CACHE
+    head = env.game.snake.head()
+    assert cfg.in_view(head, env.game.camera)
+    ox, oy = env.game.camera
+    assert 0 <= ox <= cfg.cols - cfg.view_cols and 0 <= oy <= cfg.rows - cfg.view_rows
+    # The camera lives on the game; the shared Config's mapping never moves.
+    assert (ox, oy) != (0, 0)
+    assert cfg.grid_to_px((0, 0)) == (0, 48)
+
+
+def test_small_level_has_no_camera_offset(tmp_path):
+    cfg = _level_config(tmp_path, 21, 21)
+    Game(cfg, headless=True)
+    assert cfg.camera_for((20, 20)) == (0, 0)
+    assert cfg.width == 21 * cfg.cell_size
+
+
+def test_symbolic_obs_has_walls_channel_on_levels(tmp_path):
+    cfg = _level_config(tmp_path, 21, 21)
+    env = SnakeEnv(cfg)
+    obs, _ = env.reset(seed=0)
+    assert env.channels == LEVEL_CHANNELS
+    assert obs.shape == (len(LEVEL_CHANNELS), 21, 21)
+    cells = np.frombuffer(env.game.level.cells, dtype=np.uint8).reshape(21, 21)
+    assert ((obs[-1] == 255) == (cells == WALL)).all()
+    assert SnakeEnv().obs_shape[0] == len(LEVEL_CHANNELS) - 1
+
+
+def test_start_falls_back_off_a_central_wall(tmp_path):
+    cells = bytearray(21 * 21)
+    cells[10 * 21 + 10] = WALL
+    path = tmp_path / "pillar.lvl"
+    write_level(path, 21, 21, cells)
+    cfg = Config()
+    cfg.level_file = str(path)
+    game = Game(cfg, headless=True)
+    for seed in range(5):
+        game.rng.seed(seed)
+        game.start_game()
+        head = game.snake.head()
+        assert head != (10, 10)
+        assert not game.level.blocked(head)
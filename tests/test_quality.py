@@ -0,0 +1,90 @@
+import pytest
+
+from game import Game
+from game_settings import Config
+from quality import QUALITY_FULL, QUALITY_LOW, QUALITY_MINIMAL, QUALITY_REDUCED, QualityGovernor
+
+
+def test_start_tier_is_clamped(monkeypatch):
+    monkeypatch.setattr(Config, "QUALITY_START_TIER", 7)
+    assert Game(Config(), headless=True).quality == QUALITY_MINIMAL
+    monkeypatch.setattr(Config, "QUALITY_START_TIER", -2)
+    assert Game(Config(), headless=True).quality == QUALITY_FULL
+
+
+class _Clock:
+    def __init__(self, step=0.01):
+        self.now = 0.0
+        self.step = step
+
+    def __call__(self):
+        self.now += self.step
+        return self.now
+
+
+def _governor(**kw):
+    kw.setdefault("window", 5)
+    kw.setdefault("cooldown", 10)
+    kw.setdefault("clock", _Clock())
+    return QualityGovernor(10.0, **kw)
+
+
+def _feed(governor, frame_ms, frames):
+    return [governor.record(frame_ms) for _ in range(frames)]
+
+
+def test_degrades_only_after_sustained_overrun():
+    governor = _governor()
+    # A short spike averages out inside the window.
+    assert _feed(governor, 30.0, 3) + _feed(governor, 6.0, 20) == [QUALITY_FULL] * 23
+    assert governor.changes == 0
+    # 9 ms is over the 8.5 ms degrade line (0.85 of the 10 ms budget).
+    tiers = _feed(governor, 9.0, 5)
+    assert tiers == [QUALITY_FULL] * 4 + [QUALITY_REDUCED]
+    assert governor.tier_name == "reduced"
+
+
+def test_cooldown_spaces_out_changes_and_tier_is_capped():
+    governor = _governor()
+    tiers = _feed(governor, 50.0, 60)
+    changes = [i + 1 for i in range(1, len(tiers)) if tiers[i] != tiers[i - 1]]
+    assert tiers[0] == QUALITY_FULL
+    # First change once cooldown (10) frames have passed, then one per cooldown.
+    assert changes == [10, 20, 30]
+    assert tiers[9] == QUALITY_REDUCED and tiers[-1] == QUALITY_MINIMAL
+    assert governor.changes == QUALITY_MINIMAL
+    assert _feed(governor, 50.0, 30)[-1] == QUALITY_MINIMAL
+
+
+def test_recovers_with_hysteresis():
+    governor = _governor(start_tier=QUALITY_LOW)
+    # Between the recover (5 ms) and degrade (8.5 ms) lines nothing moves.
+    assert set(_feed(governor, 7.0, 50)) == {QUALITY_LOW}
+    assert set(_feed(governor, 5.5, 50)) == {QUALITY_LOW}
+    # Under half the budget it steps back up one tier per cooldown.
+    tiers = _feed(governor, 3.0, 20)
+    assert tiers[9] == QUALITY_REDUCED and tiers[-1] == QUALITY_FULL
+    assert _feed(governor, 3.0, 20)[-1] == QUALITY_FULL
+    assert governor.changes == 2
+
+
+def test_budget_change_applies_to_the_next_decision():
+    governor = _governor()
+    _feed(governor, 7.0, 20)
+    assert governor.tier == QUALITY_FULL
+    assert governor.record(7.0, budget_ms=8.0) == QUALITY_REDUCED
+
+
+def test_tier_times_accounts_each_frame_to_the_tier_it_ran_in():
+    clock = _Clock(step=0.02)
+    governor = _governor(clock=clock)
+    _feed(governor, 50.0, 25)
+    times = governor.tier_times()
+    assert list(times) == ["full", "reduced", "low", "minimal"]
+    # The first record only starts the clock; the tier changes on frame 10
+    # and 20, and each later frame is billed to the tier it was drawn at.
+    assert times["full"] == pytest.approx(9 * 0.02)
+    assert times["reduced"] == pytest.approx(10 * 0.02)
+    assert times["low"] == pytest.approx(5 * 0.02)
+    assert times["minimal"] == 0.0
+    assert sum(times.values()) == pytest.approx(clock.now - 0.02)
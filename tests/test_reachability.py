@@ -0,0 +1,150 @@
+from collections import deque
+import random
+import threading
+
+import numpy as np
+import pytest
+
+from food import Food
+from game_settings import Config
+from level import Level, generate_maze, write_level
+from power_up import PowerUp
+from reachability import ReachabilityTracker
+import reachability
+
+
+def _regions(tracker):
+    """Canonical region labels: -1 for blocked cells, else first-seen order."""
+    seen = {}
+    out = []
+    for cell in range(tracker.size):
+        nid = tracker.node[cell]
+        out.append(-1 if nid < 0 else seen.setdefault(tracker._find(nid), len(seen)))
+    return out
+
+
+def _both(cols, rows, body, **kwargs):
+    slow = ReachabilityTracker(cols, rows, **kwargs)
+    fast = ReachabilityTracker(cols, rows, **kwargs)
+    slow.head = fast.head = body[0] if body else None
+    slow._rebuild_python(body)
+    fast._rebuild_numpy(body)
+    return slow, fast
+
+
+def test_numpy_rebuild_matches_python():
+    rng = random.Random(3)
+    for _ in range(40):
+        cols, rows = rng.randint(1, 30), rng.randint(1, 30)
+        body = [(rng.randrange(cols), rng.randrange(rows)) for _ in range(rng.randint(0, cols * rows))]
+        slow, fast = _both(cols, rows, body, wrap=rng.random() < 0.5)
+        assert bytes(slow.occ) == bytes(fast.occ)
+        assert _regions(slow) == _regions(fast)
+
+
+def test_numpy_rebuild_follows_portals(tmp_path):
+    path = tmp_path / "maze.lvl"
+    write_level(path, 41, 41, generate_maze(41, 41, seed=2), portals=[((1, 1), (39, 39))])
+    level = Level.load(str(path))
+    slow, fast = _both(41, 41, [(3, 1)], level=level)
+    assert _regions(slow) == _regions(fast)
+    fast.occupy((3, 1))
+    assert fast.reachable((39, 39), fast.head_roots())
+
+
+def _pocket_board():
+    """A 10x10 board where the snake walls off the 2x2 top-left pocket."""
+    cfg = Config()
+    cfg.set_grid(10, 10)
+    body = [(5, 5), (5, 6), (2, 0), (2, 1), (2, 2), (1, 2), (0, 2)]
+    reach = ReachabilityTracker(10, 10, wrap=False)
+    reach.rebuild(body)
+    pocket = {(0, 0), (1, 0), (0, 1), (1, 1)}
+    forbidden = {(x, y) for x in range(10) for y in range(10)} - pocket
+    return cfg, reach, forbidden, pocket
+
+
+def test_spawns_never_fall_back_into_sealed_pockets():
+    cfg, reach, forbidden, pocket = _pocket_board()
+    power_up = PowerUp(cfg, rng=random.Random(1), load_art=False)
+    assert not power_up.spawn(forbidden, 60, reach=reach)
+    food = Food(cfg, rng=random.Random(1))
+    food.pos = (9, 9)
+    food.respawn(forbidden, reach=reach)
+    assert food.pos is None
+
+
+def test_food_falls_back_when_head_is_boxed_in():
+    cfg, reach, forbidden, pocket = _pocket_board()
+    reach.rebuild([(5, 5), (4, 5), (6, 5), (5, 4), (5, 6)] + [(2, 0), (2, 1), (2, 2), (1, 2), (0, 2)])
+    assert not reach.head_roots()
+    food = Food(cfg, rng=random.Random(1))
+    food.respawn(forbidden, reach=reach)
+    assert food.pos in pocket
+
+
+def test_background_rebuild_replays_moves_made_meanwhile():
+    rng = random.Random(5)
+    cols = rows = 30
+    body = deque((x, 15) for x in range(20, 2, -1))
+    tracker = ReachabilityTracker(cols, rows, wrap=False)
+    tracker.background = True
+    gate = threading.Event()
+    compute = tracker._labels
+
+    def held(free, job=None):
+        gate.wait(5)
+        return compute(free, job)
+
+    tracker._labels = held
+    tracker.reset(list(body))
+    assert tracker.head_roots()  # answered from placeholder labels meanwhile
+    for _ in range(60):
+        hx, hy = body[0]
+        options = [(hx + dx, hy + dy) for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1))]
+        options = [p for p in options if 0 <= p[0] < cols and 0 <= p[1] < rows and p not in body]
+        if not options:
+            break
+        body.appendleft(rng.choice(options))
+        tracker.occupy(body[0])
+        tracker.release(body.pop())
+    gate.set()
+    while tracker._job is not None or tracker.dirty:
+        if tracker._job is not None:
+            tracker._job.thread.join()
+        tracker.head_roots()
+    fresh = ReachabilityTracker(cols, rows, wrap=False)
+    fresh.rebuild(list(body))
+    assert bytes(tracker.occ) == bytes(fresh.occ)
+    assert _regions(tracker) == _regions(fresh)
+
+
+@pytest.mark.parametrize("flood, batch", [(4096, 1 << 16), (0, 1 << 16), (0, 1)])
+def test_sample_fallbacks_stay_in_the_head_region(monkeypatch, flood, batch):
+    # Flood fill, vectorised batch, and full scan, in turn.
+    monkeypatch.setattr(reachability, "FLOOD_LIMIT", flood)
+    monkeypatch.setattr(reachability, "SAMPLE_BATCH", batch)
+    side, r = 120, 4
+    head = (20, 20)
+    ring = [(x, y) for x in range(20 - r, 21 + r) for y in range(20 - r, 21 + r)
+            if max(abs(x - 20), abs(y - 20)) == r]
+    tracker = ReachabilityTracker(side, side)
+    tracker.rebuild([head] + ring)
+    forbidden = set(ring) | {head, (21, 21)}
+    rng = random.Random(2)
+    for _ in range(20):
+        x, y = tracker.sample(rng, forbidden, tries=1)
+        assert max(abs(x - 20), abs(y - 20)) < r and (x, y) not in forbidden
+
+
+def test_level_spawn_fallback_is_vectorised(tmp_path):
+    path = tmp_path / "maze.lvl"
+    write_level(path, 41, 41, generate_maze(41, 41, seed=4))
+    level = Level.load(str(path))
+    ks = np.arange(level.spawn_total)
+    assert level.spawn_cells(ks).tolist() == [level.spawn_cell(k) for k in range(level.spawn_total)]
+    cells = list(level.iter_spawn_cells())
+    keep = cells[len(cells) // 2]
+    forbidden = {(c % 41, c // 41) for c in cells if c != keep}
+    assert level.sample_spawn(random.Random(0), forbidden, tries=1) == (keep % 41, keep // 41)
+    assert level.sample_spawn(random.Random(0), forbidden | {(keep % 41, keep // 41)}) is None
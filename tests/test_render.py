@@ -0,0 +1,69 @@
+import gc
+
+import pygame
+import pytest
+from pygame._sdl2 import video
+
+import render
+from game_settings import Config
+from render import TextureCanvas
+
+
+def test_texture_canvas_destroys_window_when_renderer_fails(monkeypatch):
+    windows = []
+
+    class FakeWindow:
+        def __init__(self, *args, **kwargs):
+            self.destroyed = False
+            windows.append(self)
+
+        def destroy(self):
+            self.destroyed = True
+
+    def broken_renderer(*args, **kwargs):
+        raise RuntimeError("no renderer")
+
+    monkeypatch.setattr(video, "Window", FakeWindow)
+    monkeypatch.setattr(video, "Renderer", broken_renderer)
+    with pytest.raises(RuntimeError):
+        TextureCanvas.open(Config())
+    assert len(windows) == 1 and windows[0].destroyed
+
+
+def _canvas():
+    pygame.init()
+    window = video.Window("test", size=(64, 64))
+    return TextureCanvas(video.Renderer(window, accelerated=0), (64, 64)), window
+
+
+def test_texture_cache_follows_surface_lifetime():
+    canvas, window = _canvas()
+    try:
+        a = pygame.Surface((4, 4))
+        tex = canvas._texture(a)
+        assert canvas._texture(a) is tex
+        del a
+        gc.collect()
+        assert len(canvas._textures) == 0
+        # A new surface, even one that reuses the old id(), gets its own texture.
+        b = pygame.Surface((8, 8))
+        assert canvas._texture(b).width == 8
+        assert len(canvas._textures) == 1
+    finally:
+        window.destroy()
+
+
+def test_texture_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(render, "TEXTURE_CACHE_LIMIT", 3)
+    canvas, window = _canvas()
+    try:
+        surfaces = [pygame.Surface((2, 2)) for _ in range(4)]
+        textures = [canvas._texture(s) for s in surfaces[:3]]
+        canvas._texture(surfaces[0])  # surfaces[1] is now the oldest
+        canvas._texture(surfaces[3])
+        assert len(canvas._textures) == 3
+        assert canvas._texture(surfaces[0]) is textures[0]
+        assert canvas._texture(surfaces[2]) is textures[2]
+        assert canvas._texture(surfaces[1]) is not textures[1]
+    finally:
+        window.destroy()
@@ -0,0 +1,101 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from session_server import SessionHost, SessionServer
+
+
+async def _request(reader, writer, msg):
+    writer.write(json.dumps(msg).encode() + b"\n")
+    return json.loads(await asyncio.wait_for(reader.readline(), 10))
+
+
+def test_host_rejects_malformed_fields():
+    async def main():
+        host = SessionHost()
+        sid = host.handle({"op": "create", "seed": 1})["id"]
+        assert not host.handle({"op": "input", "id": sid, "dir": ["left"]})["ok"]
+        assert not host.handle({"op": "input", "id": [sid], "dir": "left"})["ok"]
+        assert not host.handle({"op": "create", "seed": {"x": 1}})["ok"]
+        assert host.handle({"op": "input", "id": sid, "dir": "left"})["ok"]
+        host.close(sid)
+
+    asyncio.run(main())
+
+
+def test_bad_requests_do_not_break_worker_shards():
+    async def main():
+        server = await SessionServer(max_workers=1, saturation=0.0).start()
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        try:
+            created = await _request(reader, writer, {"op": "create", "seed": 3})
+            assert created["ok"]
+            sid = created["id"]
+            assert server.placement[sid] is not None  # placed on the worker
+            for bad in ({"op": "input", "id": sid, "dir": {"x": 1}},
+                        {"op": "state", "id": [sid]},
+                        [1, 2, 3]):
+                assert not (await _request(reader, writer, bad))["ok"]
+            assert (await _request(reader, writer, {"op": "state", "id": sid}))["ok"]
+
+            # A dead worker fails fast and is dropped instead of hanging callers.
+            worker = server.workers[0]
+            worker.proc.kill()
+            await asyncio.wait_for(worker._reader_task, 10)
+            assert not (await _request(reader, writer, {"op": "state", "id": sid}))["ok"]
+            assert server.workers == [] and sid not in server.placement
+        finally:
+            writer.close()
+            server.close()
+
+    asyncio.run(main())
+
+
+def test_batch_lag_is_measured_from_the_shared_due_time():
+    async def main():
+        host = SessionHost()
+        sessions = [host.create(seed=1) for _ in range(8)]
+        for session in sessions:
+            update = session.game.update
+
+            def slow(update=update):
+                time.sleep(0.003)
+                update()
+
+            session.game.update = slow
+        await asyncio.sleep(0.3)
+        lags = {session.lag_ms for session in sessions}
+        assert all(session.ticks > 0 for session in sessions)
+        # Later sessions in the batch do not inherit the earlier ones' update time.
+        assert len(lags) == 1
+        for session in sessions:
+            host.close(session.id)
+
+    asyncio.run(main())
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_load_decays_when_idle():
+    clock = _Clock()
+    host = SessionHost(clock=clock)
+    host._busy = 0.6
+    clock.now = 1.0
+    host._update_load()
+    assert host.load == pytest.approx(0.6)
+    clock.now = 1.5
+    assert host.metrics()["load"] == pytest.approx(0.6)
+    # No group has ticked for a whole window: the idle time counts.
+    host._busy = 0.3
+    clock.now = 3.0
+    assert host.load == pytest.approx(0.15)
+    clock.now = 31.0
+    assert host.metrics()["load"] == pytest.approx(0.01)
@@ -0,0 +1,62 @@
+import numpy as np
+
+from game_settings import Config
+from snake_env import PixelSnakeEnv, SnakeEnv, VectorEnv
+
+
+def test_vector_env_reports_final_observation():
+    with VectorEnv(2, max_steps=5) as envs:
+        envs.reset(seed=0)
+        for _ in range(5):
+            obs, _, terminated, truncated, infos = envs.step([1, 1])
+            last = [obs[i].copy() for i in range(2)]
+        assert truncated.all() or terminated.all()
+        for info in infos:
+            final = info["final_observation"]
+            assert final.shape == envs.single_observation_shape
+            assert final.dtype == np.uint8
+            # The terminal frame has a head in it and is not the reset frame.
+            assert final[1].any()
+        assert not all((infos[i]["final_observation"] == last[i]).all() for i in range(2))
+
+
+def test_pixel_env_leaves_callers_config_alone():
+    cfg = Config()
+    env = PixelSnakeEnv(cfg, stack=2, downsample=2)
+    assert env.cfg is not cfg
+    assert env.cfg.render_backend == "offscreen"
+    assert (cfg.render_backend, cfg.pixel_stack, cfg.pixel_downsample) == ("surface", 1, 1)
+    assert cfg.quality_adaptive
+
+
+def test_pixel_observe_copies_without_drawing():
+    env = PixelSnakeEnv(stack=3, downsample=2)
+    out = np.empty(env.obs_shape, dtype=np.uint8)
+    prev, _ = env.reset(seed=4)
+    prev = prev.copy()
+    for t in range(6):
+        drawn = env.game.canvas.frames_rendered
+        obs, *_ = env.step(t % 2 + 1)
+        env.observe(out)
+        env.observe(out)
+        assert (out == obs).all()
+        assert env.game.canvas.frames_rendered == drawn + 1
+        # The stack still shifts by exactly one frame per step.
+        obs = env.observe().copy()
+        assert (obs[:-1] == prev[1:]).all()
+        prev = obs
+
+
+def test_observations_are_independent_unless_copy_obs_is_off():
+    for env in (SnakeEnv(), PixelSnakeEnv(stack=2, downsample=4)):
+        first, _ = env.reset(seed=1)
+        kept = first.copy()
+        second, *_ = env.step(1)
+        third, *_ = env.step(2)
+        assert not np.shares_memory(second, third)
+        assert (first == kept).all()
+
+        env.copy_obs = False
+        a, *_ = env.step(1)
+        b, *_ = env.step(2)
+        assert np.shares_memory(a, b)
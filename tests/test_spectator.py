@@ -0,0 +1,227 @@
+import base64
+import os
+import random
+import socket
+import struct
+import time
+
+from game import Game
+from game_settings import Config
+from spectator import (
+    DELTA,
+    TCP_HELLO,
+    BroadcastHub,
+    Replica,
+    TickPublisher,
+    _Viewer,
+    _ws_frame,
+)
+
+
+def _run(ticks, seed=0, keyframe_ticks=60):
+    """Play random moves through a publisher; return (payload, expected board) per frame."""
+    cfg = Config()
+    cfg.set_grid(16, 16)
+    game = Game(cfg, headless=True)
+    game.rng.seed(seed)
+    game.start_game()
+    moves = random.Random(seed)
+    frames = []
+    publisher = TickPublisher(lambda payload, keyframe: frames.append(payload), keyframe_ticks)
+    log = []
+    for _ in range(ticks):
+        if game.state == "game_over" and moves.random() < 0.2:
+            game.start_game()
+        if moves.random() < 0.3:
+            game.snake.set_direction(moves.choice(((1, 0), (0, 1), (-1, 0), (0, -1))))
+        game.update()
+        sent = len(frames)
+        publisher.on_tick(game)
+        if len(frames) > sent:
+            log.append((frames[-1], _board(game)))
+    return log
+
+
+def _board(game):
+    cols = game.cfg.cols
+    food = game.food.pos
+    return (
+        [y * cols + x for x, y in game.snake.body],
+        None if food is None else food[1] * cols + food[0],
+        game.score,
+    )
+
+
+def _replica_board(replica):
+    food = replica.state.food
+    return list(replica.body), None if food == 0xFFFFFFFF else food, replica.state.score
+
+
+def test_replica_tracks_a_random_run():
+    log = _run(4000)
+    replica = Replica()
+    mismatches = 0
+    for payload, expected in log:
+        assert replica.apply(payload)
+        mismatches += _replica_board(replica) != expected
+    assert mismatches == 0
+    assert sum(payload[:1] == b"D" for payload, _ in log) > len(log) // 2
+    # A stale delta is ignored.
+    stale = next(payload for payload, _ in log if payload[:1] == b"D")
+    assert not replica.apply(stale)
+    assert _replica_board(replica) == log[-1][1]
+
+
+def test_late_joiner_syncs_from_the_next_keyframe():
+    log = _run(1500, seed=3, keyframe_ticks=25)
+    for join in (1, 17, 400, 977):
+        replica = Replica()
+        synced = False
+        for payload, expected in log[join:]:
+            applied = replica.apply(payload)
+            synced = synced or payload[:1] == b"K"
+            assert applied == synced
+            if synced:
+                assert _replica_board(replica) == expected
+        assert synced
+
+
+class _Transport:
+    def __init__(self):
+        self.buffered = 0
+        self.chunks = []
+        self.closed = False
+
+    def get_write_buffer_size(self):
+        return self.buffered
+
+    def write(self, data):
+        self.chunks.append(data)
+
+    def close(self):
+        self.closed = True
+
+
+def _delta(tick):
+    return DELTA.pack(b"D", tick, 1, 1, tick, 1, 0, -1, 0, 0)
+
+
+def _tcp_frames(data):
+    frames = []
+    while data:
+        (n,) = struct.unpack_from("<I", data)
+        frames.append(data[4 : 4 + n])
+        data = data[4 + n :]
+    return frames
+
+
+def test_slow_viewer_is_skipped_then_caught_up():
+    hub = BroadcastHub(high_water=100)
+    fast, slow = _Viewer(hub), _Viewer(hub)
+    for viewer in (fast, slow):
+        viewer.connection_made(_Transport())
+        viewer.data_received(TCP_HELLO)
+    hub._fanout(b"K" + bytes(8), True)
+    hub._fanout(_delta(2), False)
+    slow.transport.buffered = 101
+    for tick in range(3, 8):
+        hub._fanout(_delta(tick), False)
+    assert slow.lagging
+    assert hub.frames_dropped == 5
+    assert len(slow.transport.chunks) == 2
+    assert len(fast.transport.chunks) == 7
+
+    # Once drained, the slow viewer gets the keyframe plus every delta since
+    # it in one write; the frames missed in between are not queued twice.
+    slow.transport.buffered = 0
+    hub._fanout(_delta(8), False)
+    assert not slow.lagging
+    catch_up = _tcp_frames(slow.transport.chunks[-1])
+    assert catch_up[0][:1] == b"K"
+    assert catch_up[1:] == [_delta(t) for t in range(2, 9)]
+    assert len(slow.transport.chunks) == 3
+
+    # A keyframe resets the backlog a late joiner receives.
+    hub._fanout(b"K" + bytes(8), True)
+    late = _Viewer(hub)
+    late.connection_made(_Transport())
+    late.data_received(TCP_HELLO)
+    assert _tcp_frames(late.transport.chunks[0]) == [b"K" + bytes(8)]
+
+
+def _recv_exact(sock, n):
+    data = b""
+    while len(data) < n:
+        chunk = sock.recv(n - len(data))
+        assert chunk, "connection closed early"
+        data += chunk
+    return data
+
+
+def _recv_ws(sock):
+    first, n = _recv_exact(sock, 2)
+    if n == 126:
+        (n,) = struct.unpack(">H", _recv_exact(sock, 2))
+    elif n == 127:
+        (n,) = struct.unpack(">Q", _recv_exact(sock, 8))
+    return first, _recv_exact(sock, n)
+
+
+def _client_frame(opcode, payload):
+    mask = os.urandom(4)
+    masked = bytes(b ^ mask[i & 3] for i, b in enumerate(payload))
+    return bytes((0x80 | opcode, 0x80 | len(payload))) + mask + masked
+
+
+def _wait(predicate):
+    deadline = time.monotonic() + 2
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_websocket_framing_ping_and_close():
+    assert _ws_frame(b"x" * 125)[:2] == b"\x82\x7d"
+    assert _ws_frame(b"x" * 126)[:4] == b"\x82\x7e\x00\x7e"
+    assert _ws_frame(b"x" * 70000)[:10] == b"\x82\x7f" + struct.pack(">Q", 70000)
+
+    hub = BroadcastHub().start()
+    try:
+        sock = socket.create_connection(("127.0.0.1", hub.port), timeout=2)
+        key = base64.b64encode(b"the sample nonce")
+        sock.sendall(
+            b"GET / HTTP/1.1\r\nHost: localhost\r\nUpgrade: websocket\r\n"
+            b"Connection: Upgrade\r\nSec-WebSocket-Key: " + key + b"\r\n"
+            b"Sec-WebSocket-Version: 13\r\n\r\n"
+        )
+        response = b""
+        while b"\r\n\r\n" not in response:
+            response += sock.recv(1024)
+        assert response.startswith(b"HTTP/1.1 101")
+        # The RFC 6455 sample key and its accept value.
+        assert b"Sec-WebSocket-Accept: s3pPLMBiTxaQ9kYGzzhZRbK+xOo=\r\n" in response
+        _wait(lambda: hub.viewers)
+
+        payloads = [b"K" + bytes(20), b"D" * 300, b"D" * 70000]
+        hub.publish(payloads[0], True)
+        for payload in payloads[1:]:
+            hub.publish(payload)
+        for payload in payloads:
+            assert _recv_ws(sock) == (0x82, payload)
+
+        sock.sendall(_client_frame(0x9, b"are you there"))
+        assert _recv_ws(sock) == (0x8A, b"are you there")
+        # Split across writes, a ping is still answered once complete.
+        ping = _client_frame(0x9, b"")
+        sock.sendall(ping[:3])
+        time.sleep(0.02)
+        sock.sendall(ping[3:])
+        assert _recv_ws(sock) == (0x8A, b"")
+
+        sock.sendall(_client_frame(0x8, struct.pack(">H", 1000)))
+        assert _recv_ws(sock) == (0x88, struct.pack(">H", 1000))
+        assert sock.recv(16) == b""
+        _wait(lambda: not hub.viewers)
+        sock.close()
+    finally:
+        hub.stop()
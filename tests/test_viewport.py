@@ -0,0 +1,31 @@
+import pygame
+import pytest
+
+from viewport import Viewport
+
+
+@pytest.fixture
+def display():
+    pygame.display.init()
+    yield
+    pygame.display.quit()
+
+
+def test_small_window_downscales_instead_of_cropping(display):
+    view = Viewport((576, 624), mode="nearest")
+    logical = view.open()
+    view.window = pygame.display.set_mode((300, 300))
+    view.resize((300, 300))
+    assert view.window.get_rect().contains(view.dest)
+    assert view.dest.width <= 300 and view.dest.height <= 300
+    assert view.dest.width / view.dest.height == pytest.approx(576 / 624, rel=0.01)
+    view.present(logical)
+
+
+def test_large_window_uses_integer_factor(display):
+    view = Viewport((576, 624), mode="nearest")
+    view.open()
+    view.window = pygame.display.set_mode((1300, 1300))
+    view.resize((1300, 1300))
+    assert view.dest.size == (1152, 1248)
+    assert not view.smooth
@@ -0,0 +1,69 @@
+"""
+viewport.py — Present a fixed logical surface in a resizable window.
+
+The game always draws at its logical resolution; ``present`` scales that
+surface into the window in a single pass. ``"nearest"`` uses the largest
+integer factor that fits (crisp pixels, letterboxed), ``"smooth"`` fills
+the window with ``smoothscale`` while keeping the aspect ratio. A window
+smaller than the logical size is always smoothly downscaled.
+"""
+
+import pygame
+
+
+SCALE_MODES = ("nearest", "smooth")
+
+
+class Viewport:
+    def __init__(self, logical_size, scale: float = 1, mode: str = "nearest"):
+        if mode not in SCALE_MODES:
+            raise ValueError(f"unknown scale mode {mode!r}, expected one of {SCALE_MODES}")
+        self.logical_size = (int(logical_size[0]), int(logical_size[1]))
+        self.mode = mode
+        lw, lh = self.logical_size
+        self.initial_size = (max(1, int(lw * scale)), max(1, int(lh * scale)))
+        self.window = None
+        self.dest = pygame.Rect(0, 0, lw, lh)
+        self._scaled = None
+        self.smooth = mode == "smooth"
+
+    def open(self, title: str = "") -> pygame.Surface:
+        """Create the window and return the logical surface to draw into."""
+        self.window = pygame.display.set_mode(self.initial_size, pygame.RESIZABLE)
+        if title:
+            pygame.display.set_caption(title)
+        self._layout(self.window.get_size())
+        return pygame.Surface(self.logical_size).convert()
+
+    def resize(self, size):
+        self.window = pygame.display.get_surface()
+        self._layout(size)
+
+    def _layout(self, size):
+        ww, wh = max(1, size[0]), max(1, size[1])
+        lw, lh = self.logical_size
+        factor = min(ww // lw, wh // lh)
+        # Smaller than the logical size, integer scaling can't fit the window:
+        # shrink smoothly instead of cropping the HUD and board edges.
+        self.smooth = self.mode == "smooth" or factor < 1
+        if not self.smooth:
+            w, h = lw * factor, lh * factor
+        else:
+            factor = min(ww / lw, wh / lh)
+            w, h = max(1, int(lw * factor)), max(1, int(lh * factor))
+        self.dest = pygame.Rect((ww - w) // 2, (wh - h) // 2, w, h)
+        self._scaled = None
+        if self.window is not None:
+            self.window.fill((0, 0, 0))
+            if self.dest.size != self.logical_size:
+                # Scale straight into the window's pixels: one pass, no temp surface.
+                self._scaled = self.window.subsurface(self.dest)
+
+    def present(self, logical: pygame.Surface):
+        if self._scaled is None:
+            self.window.blit(logical, self.dest)
+        elif not self.smooth:
+            pygame.transform.scale(logical, self.dest.size, self._scaled)
+        else:
+            pygame.transform.smoothscale(logical, self.dest.size, self._scaled)
+        pygame.display.flip()